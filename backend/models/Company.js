@@ -9,12 +9,20 @@ const companySchema = new mongoose.Schema({
   employees: { type: String },
   revenue: { type: String },
   industries: { type: String },
+  // Normalised by the scraper for sorting and range queries. The scraper also creates every
+  // index on this collection (ensure_company_indexes in src/scrape.py), so none are declared here.
+  employee_count: { type: Number },
+  revenue_usd: { type: Number },
+  revenue_year: { type: Number },
+  industry_list: { type: [String], default: [] },
+  search_tokens: { type: [String], select: false },
   tech_stack: { type: [String], default: [] },
   wiki_title: { type: String },
   scraped_at: { type: Date },
   source: { type: [String], default: [] },
 }, { 
   timestamps: true,
+  autoIndex: false,
   strict: false // Allow extra fields from the scraper
 });
 
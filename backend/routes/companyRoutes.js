@@ -3,16 +3,62 @@ const router = express.Router();
 const Company = require('../models/Company');
 const mongoose = require('mongoose');
 
+// Must match NAME_COLLATION and search_tokens() in src/scrape.py
+const NAME_COLLATION = { locale: 'en', strength: 2 };
+const SEARCH_NGRAM = 3;
+const searchWords = (text) => text
+  .normalize('NFKD')
+  .replace(/[\u0300-\u036f]/g, '')
+  .toLowerCase()
+  .split(/[^a-z0-9]+/)
+  .filter(Boolean);
+
 router.get('/companies', async (req, res) => {
   try {
-    const { query } = req.query;
+    const { query, text, industry, min_employees, max_employees, min_revenue, max_revenue, sort } = req.query;
     let filter = {};
-    if (query) {
-      // Case-insensitive partial match on company name
-      filter.name = { $regex: query, $options: 'i' };
+    // Partial match on company name through the indexed search_tokens written by the scraper:
+    // one to two characters match a word prefix, longer queries must contain all of their trigrams
+    const compactQuery = query ? searchWords(query).join('') : '';
+    if (compactQuery.length >= SEARCH_NGRAM) {
+      const trigrams = [];
+      for (let i = 0; i + SEARCH_NGRAM <= compactQuery.length; i++) {
+        trigrams.push(compactQuery.slice(i, i + SEARCH_NGRAM));
+      }
+      filter.search_tokens = { $all: [...new Set(trigrams)] };
+    } else if (compactQuery) {
+      filter.search_tokens = compactQuery;
+    }
+    if (text) {
+      // Full-text search over description, industries and tech stack
+      filter.$text = { $search: text };
+    }
+    if (industry) {
+      filter.industry_list = industry;
     }
+    // Ranges use the scraper's numeric fields, which are indexed
+    const range = (min, max) => {
+      const bounds = {};
+      if (min !== undefined && !isNaN(Number(min))) bounds.$gte = Number(min);
+      if (max !== undefined && !isNaN(Number(max))) bounds.$lte = Number(max);
+      return Object.keys(bounds).length ? bounds : null;
+    };
+    const employeeRange = range(min_employees, max_employees);
+    if (employeeRange) filter.employee_count = employeeRange;
+    const revenueRange = range(min_revenue, max_revenue);
+    if (revenueRange) filter.revenue_usd = revenueRange;
     console.log('Fetching companies with filter:', filter);
-    const companies = await Company.find(filter).lean();
+    let companiesQuery = Company.find(filter);
+    // e.g. sort=-revenue_usd for the largest companies first
+    const sortField = sort && sort.replace(/^-/, '');
+    if (['employee_count', 'revenue_usd', 'name'].includes(sortField)) {
+      companiesQuery = companiesQuery.sort({ [sortField]: sort.startsWith('-') ? -1 : 1 });
+    }
+    let companies = await companiesQuery.lean();
+    if (compactQuery.length >= SEARCH_NGRAM) {
+      // Trigrams can all occur without being adjacent; keep only true substring matches
+      companies = companies.filter((company) => searchWords(company.name || '').join('').includes(compactQuery));
+    }
     if (!companies || companies.length === 0) {
       return res.status(200).json([]);
     }
@@ -26,7 +72,7 @@ router.get('/companies', async (req, res) => {
 router.get('/company/:companyName', async (req, res) => {
   try {
     console.log('Fetching company:', req.params.companyName);
-    const company = await Company.findOne({ name: req.params.companyName }).lean();
+    const company = await Company.findOne({ name: req.params.companyName }).collation(NAME_COLLATION).lean();
     console.log('Found company data:', company);
     if (!company) {
       console.log('Company not found:', req.params.companyName);
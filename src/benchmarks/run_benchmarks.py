@@ -0,0 +1,256 @@
+"""Offline benchmarks for the scraper's extractors.
+
+Runs scrape_wikipedia, scrape_wikipedia_tech_stack, scrape_website and job_scraper.scrape_jobs
+over the saved fixtures in benchmarks/fixtures with all network access served from disk, and
+reports per-page parse time, peak memory and field parity against fixtures/golden.json.
+
+Usage (from the src directory):
+    python benchmarks/run_benchmarks.py [--repeat N] [--only NAME ...] [--json PATH] [--update-golden]
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from unittest import mock
+from urllib.parse import parse_qs, unquote, urlparse
+
+# Configure logging before importing the scraper so its DEBUG file handler is never installed
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+GOLDEN_PATH = os.path.join(FIXTURES_DIR, 'golden.json')
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import requests  # noqa: E402
+from requests.structures import CaseInsensitiveDict  # noqa: E402
+
+import job_scraper  # noqa: E402
+import scrape  # noqa: E402
+
+logger = logging.getLogger('benchmarks')
+
+
+def load_manifest():
+    with open(os.path.join(FIXTURES_DIR, 'manifest.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)['companies']
+
+
+def read_fixture(relative_path):
+    with open(os.path.join(FIXTURES_DIR, relative_path), 'rb') as f:
+        return f.read()
+
+
+def make_response(url, status=200, body=b'', headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response.headers = CaseInsensitiveDict(headers or {'Content-Type': 'text/html; charset=utf-8'})
+    response.url = url
+    response.encoding = 'utf-8'
+    response.reason = 'OK' if status < 400 else 'Not Found'
+    return response
+
+
+class FixtureSession:
+    """Stand-in for the scraper's requests session that answers every request from the fixtures."""
+    def __init__(self, companies):
+        self.companies = companies
+        self.by_title = {info['wiki_title']: info for info in companies.values()}
+        self.by_website = {info['website'].rstrip('/'): info for info in companies.values() if info.get('website')}
+        self.timeout = 15
+        self.requests = 0
+
+    def _company_for_term(self, term):
+        for name, info in self.companies.items():
+            if term.startswith(name):
+                return info
+        return None
+
+    def _wiki_api(self, url, params):
+        if params.get('action') == 'opensearch':
+            info = self._company_for_term(params['search'])
+            titles = [info['wiki_title']] if info else []
+            return make_response(url, body=json.dumps([params['search'], titles, [], []]).encode('utf-8'))
+        pages = {}
+        for i, title in enumerate(params.get('titles', '').split('|')):
+            info = self.by_title.get(title)
+            if not info:
+                pages[str(-1 - i)] = {'title': title, 'missing': ''}
+                continue
+            extract = info['wiki_summary'] if params.get('exintro') else info['wiki_extract']
+            pages[str(1000 + i)] = {
+                'title': title,
+                'extract': extract,
+                'fullurl': f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"
+            }
+        return make_response(url, body=json.dumps({'query': {'pages': pages}}).encode('utf-8'))
+
+    def request(self, method, url, params=None, headers=None, **kwargs):
+        self.requests += 1
+        parsed = urlparse(url)
+        if url == scrape.WIKIPEDIA_API_URL:
+            return self._wiki_api(url, params or {})
+        if parsed.netloc == 'en.wikipedia.org' and parsed.path.startswith('/wiki/'):
+            info = self.by_title.get(unquote(parsed.path[len('/wiki/'):]).replace('_', ' '))
+            return make_response(url, body=read_fixture(info['wiki_html'])) if info else make_response(url, 404)
+        if parsed.netloc == 'logo.clearbit.com':
+            return make_response(url, headers={'Content-Type': 'image/png'})
+        if parsed.netloc.endswith('indeed.com'):
+            query = parse_qs(parsed.query).get('q', [''])[0]
+            info = self.companies.get(query.split(':', 1)[-1])
+            return make_response(url, body=read_fixture(info['indeed_html'])) if info and info.get('indeed_html') else make_response(url, 404)
+        info = self.by_website.get(url.rstrip('/'))
+        if info:
+            body = b'' if method == 'HEAD' else read_fixture(info['homepage_html'])
+            return make_response(url, body=body, headers=info.get('homepage_headers'))
+        return make_response(url, 404)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.request('HEAD', url, **kwargs)
+
+    def close(self):
+        pass
+
+
+def build_scraper(session):
+    scraper = scrape.CompanyScraper('', skip_mongodb=True, host_delay=0, wiki_titles_path=None,
+                                    websites_cache_path=None, logo_cache_path=None)
+    if scraper.browser_pool:
+        scraper.browser_pool.close()
+        scraper.browser_pool = None
+    scraper.session = session
+    return scraper
+
+
+def bench_wikipedia(scraper, session, company, info):
+    scraper.wiki_titles.titles.clear()
+    scraper._wiki_candidates.clear()
+    return scraper.scrape_wikipedia(company)
+
+
+def bench_wikipedia_tech_stack(scraper, session, company, info):
+    return scraper.scrape_wikipedia_tech_stack(info['_soup'], company)
+
+
+def bench_website(scraper, session, company, info):
+    scraper.logo_cache.entries.clear()
+    return scraper.scrape_website(company)
+
+
+def bench_jobs(scraper, session, company, info):
+    with mock.patch.object(job_scraper.requests, 'get', session.get):
+        jobs = job_scraper.scrape_jobs(company)
+    return [{k: v for k, v in job.items() if k != 'scraped_at'} for job in jobs]
+
+
+EXTRACTORS = {
+    'wikipedia': bench_wikipedia,
+    'wikipedia_tech_stack': bench_wikipedia_tech_stack,
+    'website': bench_website,
+    'jobs': bench_jobs
+}
+
+
+def diff_fields(actual, expected):
+    """Return the top-level fields whose values differ from the golden output."""
+    if isinstance(actual, dict) and isinstance(expected, dict):
+        return sorted(k for k in set(actual) | set(expected) if actual.get(k) != expected.get(k))
+    return [] if actual == expected else ['<value>']
+
+
+def run(repeat, only):
+    companies = load_manifest()
+    session = FixtureSession(companies)
+    scraper = build_scraper(session)
+    for company, info in companies.items():
+        info['_soup'] = scraper._fetch_wikipedia_page(info['wiki_title'])
+
+    results = []
+    outputs = {}
+    for name, extractor in EXTRACTORS.items():
+        if only and name not in only:
+            continue
+        for company, info in companies.items():
+            session.requests = 0
+            output = extractor(scraper, session, company, info)
+            requests_made = session.requests
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                extractor(scraper, session, company, info)
+                timings.append((time.perf_counter() - start) * 1000)
+            tracemalloc.start()
+            extractor(scraper, session, company, info)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            outputs.setdefault(company, {})[name] = output
+            results.append({
+                'extractor': name,
+                'company': company,
+                'min_ms': round(min(timings), 3),
+                'median_ms': round(statistics.median(timings), 3),
+                'peak_kib': round(peak / 1024, 1),
+                'requests': requests_made
+            })
+    scraper.close_connection()
+    return results, outputs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per extractor and page')
+    parser.add_argument('--only', nargs='*', choices=sorted(EXTRACTORS), help='run only these extractors')
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--update-golden', action='store_true', help='overwrite golden.json with the current outputs')
+    args = parser.parse_args(argv)
+
+    results, outputs = run(max(1, args.repeat), args.only)
+
+    golden = {}
+    if os.path.exists(GOLDEN_PATH):
+        with open(GOLDEN_PATH, 'r', encoding='utf-8') as f:
+            golden = json.load(f)
+    mismatches = 0
+    for row in results:
+        expected = golden.get(row['company'], {}).get(row['extractor'])
+        actual = json.loads(json.dumps(outputs[row['company']][row['extractor']], default=str))
+        row['parity'] = 'n/a' if expected is None else ('ok' if actual == expected else 'DIFF ' + ','.join(diff_fields(actual, expected)))
+        if row['parity'].startswith('DIFF'):
+            mismatches += 1
+
+    header = f"{'extractor':<22}{'company':<12}{'min ms':>10}{'median ms':>12}{'peak KiB':>11}{'requests':>10}  parity"
+    print(header)
+    print('-' * len(header))
+    for row in results:
+        print(f"{row['extractor']:<22}{row['company']:<12}{row['min_ms']:>10.3f}{row['median_ms']:>12.3f}"
+              f"{row['peak_kib']:>11.1f}{row['requests']:>10}  {row['parity']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_golden:
+        for company, by_extractor in outputs.items():
+            golden.setdefault(company, {}).update(json.loads(json.dumps(by_extractor, default=str)))
+        with open(GOLDEN_PATH, 'w', encoding='utf-8') as f:
+            json.dump(golden, f, indent=2, ensure_ascii=False, sort_keys=True)
+            f.write('\n')
+        print(f"Updated {GOLDEN_PATH}")
+        return 0
+
+    if mismatches:
+        print(f"{mismatches} extractor outputs differ from golden.json")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
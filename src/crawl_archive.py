@@ -0,0 +1,221 @@
+import gzip
+import logging
+import threading
+import uuid
+import zlib
+from datetime import datetime, UTC
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger(__name__)
+
+# Headers describing the wire encoding. Bodies are archived (and kept in scrape.HttpCache) decoded,
+# so these no longer apply to them.
+DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding'}
+
+
+class ArchiveMissError(requests.exceptions.ConnectionError):
+    """Raised by ReplaySession for a request that the crawl archive holds no response for."""
+
+
+def archive_url(method, url, params=None):
+    """Return the full URL, query string included, under which a request is archived."""
+    return requests.Request(method, url, params=params).prepare().url
+
+
+class CrawlArchive:
+    """Append-only WARC file of every raw response a crawl received, one gzip member per record.
+
+    Each response is stored as a WARC/1.0 'response' record holding the HTTP status line,
+    headers and decoded body, plus a WARC-Method extension field so GET and HEAD answers for
+    the same URL are kept apart. 'warcinfo' records list the companies a run scraped.
+    Records are compressed on the calling thread; only the append is serialised.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.records = 0
+        self._lock = threading.Lock()
+        self._file = open(path, 'ab')
+        logger.info(f"Recording crawl responses to {path}")
+
+    def _write(self, warc_type, fields, block):
+        header = [
+            'WARC/1.0',
+            f'WARC-Type: {warc_type}',
+            f'WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>',
+            f"WARC-Date: {datetime.now(UTC).strftime('%Y-%m-%dT%H:%M:%SZ')}",
+            *(f'{name}: {value}' for name, value in fields.items()),
+            f'Content-Length: {len(block)}'
+        ]
+        data = gzip.compress('\r\n'.join(header).encode('utf-8') + b'\r\n\r\n' + block + b'\r\n\r\n')
+        with self._lock:
+            self._file.write(data)
+            self._file.flush()
+            self.records += 1
+
+    def write_info(self, companies):
+        """Record the companies a run is about to scrape, so a replay can rerun exactly those."""
+        block = ''.join(f'company: {company}\r\n' for company in companies).encode('utf-8')
+        self._write('warcinfo', {'Content-Type': 'application/warc-fields'}, block)
+
+    def record(self, method, url, status, headers, body, reason='', final_url=None):
+        """Append one response; url is the requested URL including its query string."""
+        lines = [f'HTTP/1.1 {status} {reason or ""}'.rstrip()]
+        lines += [f'{name}: {value}' for name, value in headers.items() if name.lower() not in DROPPED_HEADERS]
+        lines.append(f'Content-Length: {len(body)}')
+        block = '\r\n'.join(lines).encode('utf-8') + b'\r\n\r\n' + body
+        fields = {'WARC-Target-URI': url, 'WARC-Method': method.upper(),
+                  'Content-Type': 'application/http; msgtype=response'}
+        if final_url and final_url != url:
+            fields['WARC-Final-URI'] = final_url
+        self._write('response', fields, block)
+
+    def record_response(self, method, url, response):
+        self.record(method, url, response.status_code, response.headers, response.content,
+                    response.reason, response.url)
+
+    def record_page(self, url, content):
+        """Append a page rendered by the browser as if it had been fetched with a plain GET."""
+        self.record('GET', url, 200, {'Content-Type': 'text/html; charset=utf-8'}, content.encode('utf-8'), 'OK')
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+        logger.info(f"Crawl archive {self.path}: {self.records} records written")
+
+
+def _split_block(data):
+    head, _, rest = data.partition(b'\r\n\r\n')
+    fields = CaseInsensitiveDict()
+    lines = head.decode('utf-8').split('\r\n')
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        fields[name.strip()] = value.strip()
+    return lines[0], fields, rest
+
+
+class ArchiveReader:
+    """Random access to the responses in a CrawlArchive file.
+
+    Opening the file makes one pass over it to find where each gzip member starts; a lookup
+    then decompresses only the record it needs. When a request was archived more than once,
+    the latest response wins. Lookups are thread-safe.
+    """
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self, path):
+        self.path = path
+        self.index = {}  # (method, url) -> (offset, compressed length)
+        self.companies = {}  # insertion-ordered set of the companies recorded runs scraped
+        self._lock = threading.Lock()
+        records = 0
+        for offset, length, data in self._iter_members():
+            _, fields, block = _split_block(data)
+            warc_type = fields.get('WARC-Type')
+            if warc_type == 'response':
+                self.index[(fields.get('WARC-Method', 'GET'), fields['WARC-Target-URI'])] = (offset, length)
+            elif warc_type == 'warcinfo':
+                for line in block.decode('utf-8').split('\r\n'):
+                    name, _, value = line.partition(':')
+                    if name == 'company' and value.strip():
+                        self.companies[value.strip()] = None
+            records += 1
+        self._file = open(path, 'rb')
+        logger.info(f"Loaded crawl archive {path}: {records} records, {len(self.index)} distinct requests, "
+                    f"{len(self.companies)} companies")
+
+    def _iter_members(self):
+        """Yield (offset, compressed length, decompressed bytes) for each gzip member in the file."""
+        with open(self.path, 'rb') as f:
+            start = position = 0
+            decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+            parts = []
+            pending = b''
+            while True:
+                chunk = pending or f.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                pending = b''
+                parts.append(decompressor.decompress(chunk))
+                if not decompressor.eof:
+                    position += len(chunk)
+                    continue
+                position += len(chunk) - len(decompressor.unused_data)
+                yield start, position - start, b''.join(parts)
+                pending = decompressor.unused_data
+                start = position
+                decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+                parts = []
+            if position > start:
+                logger.warning(f"Ignoring a truncated record at the end of crawl archive {self.path}")
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def response(self, method, url):
+        """Rebuild the archived requests.Response for a request, or return None if it was never recorded.
+
+        A HEAD with no record of its own is answered from an archived GET of the URL, just as the
+        live crawl's request memo answers it, with the headers and an empty body.
+        """
+        method = method.upper()
+        location = self.index.get((method, url))
+        head_from_get = location is None and method == 'HEAD'
+        if head_from_get:
+            location = self.index.get(('GET', url))
+        if location is None:
+            return None
+        offset, length = location
+        with self._lock:
+            self._file.seek(offset)
+            data = self._file.read(length)
+        _, fields, block = _split_block(gzip.decompress(data))
+        content_length = int(fields['Content-Length'])
+        status_line, headers, body = _split_block(block[:content_length])
+        _, status, reason = (status_line.split(' ', 2) + [''])[:3]
+        response = requests.Response()
+        response.status_code = int(status)
+        response.reason = reason
+        response.headers = headers
+        response._content = b'' if head_from_get else body
+        response.encoding = get_encoding_from_headers(headers)
+        response.url = fields.get('WARC-Final-URI') or url
+        response.request = requests.Request(method, url).prepare()
+        response.from_archive = True
+        return response
+
+    def close(self):
+        self._file.close()
+
+
+class ReplaySession(requests.Session):
+    """requests.Session that answers every request from an ArchiveReader and never touches the network.
+
+    A request the archive has no response for fails like a refused connection (ArchiveMissError),
+    just as the original crawl would have seen no response for it.
+    """
+    def __init__(self, reader):
+        super().__init__()
+        self.reader = reader
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def request(self, method, url, params=None, *args, **kwargs):
+        key_url = archive_url(method, url, params)
+        response = self.reader.response(method, key_url)
+        with self._lock:
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if response is None:
+            logger.debug("No archived response for %s %s", method, key_url)
+            raise ArchiveMissError(f"{method.upper()} {key_url} is not in the crawl archive")
+        return response
+
+    def close(self):
+        super().close()
+        self.reader.close()
@@ -0,0 +1,456 @@
+"""HTML extraction for Wikipedia articles and company homepages.
+
+These functions only look at page content: no network access and no scraper state. The scraper calls
+them on its own threads, and the parse pipeline runs parse_company_pages in worker processes, which
+import this module instead of the whole scraper.
+"""
+import html
+import logging
+import re
+import time
+from logging.handlers import QueueHandler
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+logger = logging.getLogger('scrape')
+
+# Prefer the C-based lxml parser when it is installed
+try:
+    import lxml  # noqa: F401
+    DEFAULT_HTML_PARSER = 'lxml'
+except ImportError:
+    DEFAULT_HTML_PARSER = 'html.parser'
+
+# Only the elements the extractors read are built into the tree
+WIKIPEDIA_BLOCK_TAGS = ('table', 'h2', 'h3', 'p', 'ul', 'ol')
+WIKIPEDIA_PARSE_ONLY = SoupStrainer(list(WIKIPEDIA_BLOCK_TAGS))
+WEBSITE_PARSE_ONLY = SoupStrainer(['script', 'link', 'meta', 'img'])
+WHITESPACE_RE = re.compile(r'\s+')
+# Raw-HTML checks for the fetch stage, which decides on an article without parsing it
+INFOBOX_TABLE_RE = re.compile(r'<table\b[^>]*\bclass="(?:[^"]*\s)?infobox(?:\s[^"]*)?"', re.IGNORECASE)
+INFOBOX_WEBSITE_RE = re.compile(r'>\s*Website\s*</th>\s*<td[^>]*>(?:(?!</td>).)*?href="([^"]+)"', re.IGNORECASE | re.DOTALL)
+
+# Normalisers for the numeric fields, e.g. "2,100,000 (2024)" and "US$648.1 billion (2024)[1]"
+FOOTNOTE_RE = re.compile(r'\[(?:\d+|[a-z]|note \d+|citation needed)\]', re.IGNORECASE)
+SCALES = {'thousand': 1e3, 'k': 1e3, 'million': 1e6, 'mn': 1e6, 'm': 1e6, 'billion': 1e9, 'bn': 1e9, 'b': 1e9, 'trillion': 1e12}
+SCALE_PATTERN = r'(?:\s*(thousand|million|billion|trillion|mn|bn|k|m|b)\b)?'
+EMPLOYEES_RE = re.compile(r'(\d[\d,]*(?:\.\d+)?)' + SCALE_PATTERN, re.IGNORECASE)
+# A bare $ only counts when no letter precedes it: NT$, HK$, A$, R$ and the like are other currencies
+REVENUE_USD_RE = re.compile(r'(?<![A-Za-z])(?:US\$|USD|\$)\s*(\d[\d,]*(?:\.\d+)?)' + SCALE_PATTERN, re.IGNORECASE)
+YEAR_RE = re.compile(r'\b(?:FY\s*)?((?:19|20)\d{2})\b')
+INDUSTRY_SPLIT_RE = re.compile(r'\s*[\n,;•·]\s*')
+
+# Tech-stack signatures: lowercase keyword -> display name
+TECH_LANGUAGES = {
+    'python': 'Python',
+    'javascript': 'JavaScript',
+    'java': 'Java',
+    'c++': 'C++',
+    'c#': 'C#',
+    'ruby': 'Ruby',
+    'php': 'PHP',
+    'swift': 'Swift',
+    'kotlin': 'Kotlin',
+    'typescript': 'TypeScript',
+    'go': 'Go',
+    'rust': 'Rust'
+}
+TECH_TOOLS = {
+    'git': 'Git',
+    'docker': 'Docker',
+    'jenkins': 'Jenkins',
+    'kubernetes': 'Kubernetes',
+    'ansible': 'Ansible',
+    'terraform': 'Terraform',
+    'aws': 'AWS',
+    'azure': 'Azure',
+    'gcp': 'Google Cloud Platform',
+    'cloudflare': 'Cloudflare'
+}
+TECH_FRAMEWORKS = {
+    'react': 'React',
+    'angular': 'Angular',
+    'vue': 'Vue.js',
+    'django': 'Django',
+    'flask': 'Flask',
+    'node': 'Node.js',
+    'express': 'Express.js',
+    'wordpress': 'WordPress',
+    'next': 'Next.js',
+    'gatsby': 'Gatsby',
+    'tailwind': 'Tailwind CSS',
+    'laravel': 'Laravel',
+    'svelte': 'Svelte',
+    'nuxt': 'Nuxt.js'
+}
+# Front-end libraries only looked for on company websites
+WEB_FRAMEWORKS = {
+    **TECH_FRAMEWORKS,
+    'jquery': 'jQuery',
+    'bootstrap': 'Bootstrap'
+}
+
+class TechMatcher:
+    """Single-pass keyword matcher compiled once from a keyword -> tech name mapping."""
+    def __init__(self, signatures):
+        self.signatures = dict(signatures)
+        # Longest keywords first so overlapping alternatives prefer the most specific match;
+        # the lookarounds stop 'go' matching "google" and 'java' matching "javascript"
+        alternation = '|'.join(re.escape(key) for key in sorted(self.signatures, key=len, reverse=True))
+        self.pattern = re.compile(rf'(?<![a-z0-9])(?:{alternation})(?![a-z0-9])', re.IGNORECASE)
+
+    def find(self, text):
+        """Return the distinct tech names mentioned in text, in order of first appearance."""
+        if not text:
+            return []
+        hits = []
+        for match in self.pattern.finditer(text):
+            tech = self.signatures[match.group(0).lower()]
+            if tech not in hits:
+                hits.append(tech)
+        return hits
+
+WIKIPEDIA_TECH_MATCHER = TechMatcher({**TECH_LANGUAGES, **TECH_TOOLS, **TECH_FRAMEWORKS})
+WEBSITE_TECH_MATCHER = TechMatcher({**WEB_FRAMEWORKS, **TECH_LANGUAGES, **TECH_TOOLS})
+WEB_FRAMEWORK_MATCHER = TechMatcher(WEB_FRAMEWORKS)
+
+def normalize_website(url):
+    """Turn an infobox link or bare domain into an absolute https URL."""
+    if not url:
+        return None
+    url = url.strip().split()[0]
+    if url.startswith('//'):
+        return f"https:{url}"
+    if not re.match(r'^https?://', url, re.IGNORECASE):
+        return f"https://{url}"
+    return url
+
+def clean_text(text, parser=DEFAULT_HTML_PARSER):
+    """Clean scraped text by removing extra whitespace, special characters, and HTML tags."""
+    if text:
+        if '<' in text:
+            text = BeautifulSoup(text, parser).get_text(separator=' ')
+        elif '&' in text:
+            # Plain text with entities: no markup to parse
+            text = html.unescape(text)
+        return WHITESPACE_RE.sub(' ', text.strip())
+    return None
+
+def has_infobox(page_html):
+    """Return True if the raw article HTML contains an infobox table."""
+    return bool(INFOBOX_TABLE_RE.search(page_html or ''))
+
+def infobox_website(page_html):
+    """Return the official website linked from the raw article's infobox, or None."""
+    match = INFOBOX_WEBSITE_RE.search(page_html or '')
+    return normalize_website(html.unescape(match.group(1))) if match else None
+
+def _scaled_number(digits, scale):
+    value = float(digits.replace(',', ''))
+    return value * SCALES[scale.lower()] if scale else value
+
+def parse_employee_count(text):
+    """Return the headcount in text as an int, e.g. 2100000 for "2,100,000 (2024)", or None."""
+    if not text:
+        return None
+    text = FOOTNOTE_RE.sub('', text)
+    for match in EMPLOYEES_RE.finditer(text):
+        # Skip a leading year such as "(2024) 2,100,000"
+        if YEAR_RE.fullmatch(match.group(1)) and not match.group(2):
+            continue
+        return int(round(_scaled_number(match.group(1), match.group(2))))
+    return None
+
+def parse_revenue_usd(text):
+    """Return (amount_usd, year) for the first US dollar figure in text; either may be None.
+
+    Other currencies are left unparsed rather than converted at an arbitrary rate.
+    """
+    if not text:
+        return None, None
+    text = FOOTNOTE_RE.sub('', text)
+    match = REVENUE_USD_RE.search(text)
+    if not match:
+        return None, None
+    year = YEAR_RE.search(text, match.end())
+    return int(round(_scaled_number(match.group(1), match.group(2)))), int(year.group(1)) if year else None
+
+def split_industries(text):
+    """Split an industries cell or sentence into a list of distinct industry names."""
+    if not text:
+        return []
+    industries = []
+    for part in INDUSTRY_SPLIT_RE.split(FOOTNOTE_RE.sub('', text)):
+        part = WHITESPACE_RE.sub(' ', part).strip(' .')
+        if part and part not in industries:
+            industries.append(part)
+    return industries
+
+def normalize_company_fields(fields, industries_text=None):
+    """Add numeric employee_count, revenue_usd and revenue_year and an industry_list to extracted fields.
+
+    industries_text is the industries cell text with its line breaks kept, when available, since
+    the cleaned string runs list items together.
+    """
+    fields['employee_count'] = parse_employee_count(fields.get('employees'))
+    fields['revenue_usd'], fields['revenue_year'] = parse_revenue_usd(fields.get('revenue'))
+    fields['industry_list'] = split_industries(industries_text or fields.get('industries'))
+    return fields
+
+def add_tech(tech_stack, hits, where, company_name):
+    """Append newly detected technologies to tech_stack, preserving detection order."""
+    for tech in hits:
+        if tech not in tech_stack:
+            tech_stack.append(tech)
+            logger.debug("Detected %s in %s for %s", tech, where, company_name)
+
+FIELD_SECTION_KEYWORDS = ['operations', 'history', 'financials', 'business', 'about']
+TECH_SECTION_KEYWORDS = ['products', 'services', 'technology', 'operations', 'software', 'hardware', 'research']
+TECH_INFOBOX_KEYWORDS = ['products', 'services', 'technology']
+
+class WikipediaDocument:
+    """One-pass index of a parsed article, shared by the field and tech-stack extractors.
+
+    A single walk over the page's outermost block elements (tables, headings, paragraphs and
+    lists, as WIKIPEDIA_PARSE_ONLY keeps them) collects the first infobox's rows as (lowercased
+    header, cleaned cell text, cell) tuples, each h2/h3 section as (title, cleaned text) in page
+    order, and the cleaned paragraphs, joined and lowercased as body_text. Strained and fully
+    parsed pages give the same index.
+    """
+    def __init__(self, soup, parser=DEFAULT_HTML_PARSER):
+        self.infobox_rows = []
+        self.sections = []
+        paragraphs = []
+        infobox = None
+        section_title = None
+        section_parts = []
+
+        def close_section():
+            if section_title and section_parts:
+                self.sections.append((section_title, clean_text(' '.join(section_parts), parser)))
+
+        for element in _outermost_blocks(soup):
+            name = element.name
+            if name in ('h2', 'h3'):
+                close_section()
+                section_title = clean_text(element.text, parser)
+                section_parts = []
+                continue
+            if section_title:
+                section_parts.append(element.get_text())
+            if name == 'p':
+                paragraphs.append(element)
+                continue
+            paragraphs.extend(element.find_all('p'))
+            if infobox is None and name == 'table':
+                infobox = element if 'infobox' in (element.get('class') or []) else element.find('table', {'class': 'infobox'})
+        close_section()
+
+        if infobox:
+            for row in infobox.find_all('tr'):
+                header = row.find('th')
+                cell = row.find('td') if header else None
+                if cell:
+                    self.infobox_rows.append((header.text.lower().strip(), clean_text(cell.text, parser), cell))
+        self.has_infobox = infobox is not None
+        self.body_text = '\n'.join(filter(None, (clean_text(p.text, parser) for p in paragraphs))).lower()
+
+def _outermost_blocks(soup):
+    """Yield, in document order, the WIKIPEDIA_BLOCK_TAGS elements not nested in another one.
+
+    For a soup parsed with WIKIPEDIA_PARSE_ONLY these are simply its top-level elements.
+    """
+    stack = [iter(soup.children)]
+    while stack:
+        element = next(stack[-1], None)
+        if element is None:
+            stack.pop()
+            continue
+        name = getattr(element, 'name', None)
+        if not name:
+            continue
+        if name in WIKIPEDIA_BLOCK_TAGS:
+            yield element
+        else:
+            stack.append(iter(element.children))
+
+def as_wikipedia_document(page, parser=DEFAULT_HTML_PARSER):
+    """Return page as a WikipediaDocument, indexing it first if it is a parsed soup."""
+    return page if isinstance(page, WikipediaDocument) else WikipediaDocument(page, parser)
+
+def extract_wikipedia_fields(page, company_name, parser=DEFAULT_HTML_PARSER):
+    """Return employees, revenue, industries and website from an article's infobox, falling back to section text.
+
+    page is a WikipediaDocument or a parsed article. The raw strings are kept;
+    normalize_company_fields adds their numeric and list forms.
+    """
+    document = as_wikipedia_document(page, parser)
+    employees = None
+    revenue = None
+    industries = None
+    industries_text = None
+    website = None
+    for header_text, cell_text, cell in document.infobox_rows:
+        if 'employees' in header_text:
+            employees = cell_text
+            logger.debug("Found employees for %s: %s", company_name, employees)
+        elif 'revenue' in header_text:
+            revenue = cell_text
+            logger.debug("Found revenue for %s: %s", company_name, revenue)
+        elif 'industry' in header_text or 'industries' in header_text:
+            industries = cell_text
+            industries_text = cell.get_text(separator='\n')
+            logger.debug("Found industries for %s: %s", company_name, industries)
+        elif header_text == 'website':
+            link = cell.find('a', href=True)
+            website = normalize_website(link['href'] if link else cell_text)
+            logger.debug("Found website for %s: %s", company_name, website)
+
+    # Fallback: Scrape sections if infobox is missing or incomplete
+    if not all([employees, revenue, industries]):
+        for section_title, section_text in document.sections:
+            if not section_text or not any(keyword in section_title.lower() for keyword in FIELD_SECTION_KEYWORDS):
+                continue
+            section_text = section_text.lower()
+            if not employees and 'employees' in section_text:
+                match = re.search(r'(\d{1,3}(?:,\d{3})*(?:\s*\(\d{4}\))?) employees', section_text, re.IGNORECASE)
+                if match:
+                    employees = match.group(1)
+                    logger.debug("Found employees in section for %s: %s", company_name, employees)
+            if not revenue and 'revenue' in section_text:
+                match = re.search(r'revenue.*?(?:us\$|USD)\s*([\d.]+)\s*(billion|million)', section_text, re.IGNORECASE)
+                if match:
+                    revenue = f"US${match.group(1)} {match.group(2)}"
+                    logger.debug("Found revenue in section for %s: %s", company_name, revenue)
+            if not industries and 'industry' in section_text:
+                match = re.search(r'industr(?:y|ies):?\s*([a-zA-Z\s,]+)', section_text, re.IGNORECASE)
+                if match:
+                    industries = match.group(1).strip()
+                    logger.debug("Found industries in section for %s: %s", company_name, industries)
+
+    fields = {'employees': employees, 'revenue': revenue, 'industries': industries, 'website': website}
+    return normalize_company_fields(fields, industries_text)
+
+def extract_wikipedia_tech_stack(page, company_name, parser=DEFAULT_HTML_PARSER):
+    """Scrape programming languages, tools, and frameworks from Wikipedia infobox, article, and specific sections.
+
+    page is a WikipediaDocument or a parsed article.
+    """
+    document = as_wikipedia_document(page, parser)
+    tech_stack = []
+
+    # Check infobox
+    for header_text, cell_text, _ in document.infobox_rows:
+        if any(keyword in header_text for keyword in TECH_INFOBOX_KEYWORDS):
+            add_tech(tech_stack, WIKIPEDIA_TECH_MATCHER.find(cell_text), "Wikipedia infobox", company_name)
+
+    # Check specific sections
+    for section_title, section_text in document.sections:
+        if any(keyword in section_title.lower() for keyword in TECH_SECTION_KEYWORDS):
+            add_tech(tech_stack, WIKIPEDIA_TECH_MATCHER.find(section_text), f"Wikipedia section '{section_title}'", company_name)
+
+    # Check all paragraphs in one scan of the body text
+    add_tech(tech_stack, WIKIPEDIA_TECH_MATCHER.find(document.body_text), "Wikipedia paragraph", company_name)
+
+    logger.debug("Extracted tech stack from Wikipedia for %s: %s", company_name, tech_stack)
+    return tech_stack
+
+def find_website_logo(soup, company_name, website):
+    """Return the absolute URL of the first homepage image that looks like the company logo, or None."""
+    for img in soup.find_all('img'):
+        alt_text = img.get('alt', '').lower()
+        src_text = img.get('src', '').lower()
+        class_text = ' '.join(img.get('class', [])).lower()
+        if 'logo' in alt_text or 'logo' in src_text or 'logo' in class_text or company_name.lower() in alt_text:
+            logo = img.get('src')
+            if logo and not logo.startswith('http'):
+                logo = f"{website.rstrip('/')}/{logo.lstrip('/')}"
+            return logo
+    return None
+
+def detect_website_tech(soup, company_name):
+    """Detect technologies from a homepage's script, stylesheet link and meta tags."""
+    tech_stack = []
+
+    # Check scripts
+    scripts = soup.find_all('script')
+    for script in scripts:
+        src = script.get('src', '').lower()
+        add_tech(tech_stack, WEBSITE_TECH_MATCHER.find(src), "website script", company_name)
+        add_tech(tech_stack, WEBSITE_TECH_MATCHER.find(script.text), "website script", company_name)
+        if src and '.js' in src and 'JavaScript' not in tech_stack:
+            tech_stack.append('JavaScript')
+            logger.debug("Detected JavaScript in website script for %s", company_name)
+        if src and '.py' in src and 'Python' not in tech_stack:
+            tech_stack.append('Python')
+            logger.debug("Detected Python in website script for %s", company_name)
+
+    # Check link tags for CSS frameworks
+    links = soup.find_all('link', {'rel': 'stylesheet'})
+    for link in links:
+        href = link.get('href', '')
+        add_tech(tech_stack, WEB_FRAMEWORK_MATCHER.find(href), "website link tag", company_name)
+
+    # Check meta tags
+    meta_tags = soup.find_all('meta')
+    for meta in meta_tags:
+        content = meta.get('content', '')
+        add_tech(tech_stack, WEBSITE_TECH_MATCHER.find(content), "website meta tag", company_name)
+
+    return tech_stack
+
+def detect_header_tech(tech_stack, headers, company_name):
+    """Add technologies revealed by the homepage's X-Powered-By and Server response headers."""
+    headers_lower = {k.lower(): v.lower() for k, v in headers.items()}
+    if 'x-powered-by' in headers_lower:
+        powered_by = headers_lower['x-powered-by']
+        add_tech(tech_stack, WEBSITE_TECH_MATCHER.find(powered_by), "website headers", company_name)
+    if 'server' in headers_lower and 'cloudflare' in headers_lower['server'] and 'Cloudflare' not in tech_stack:
+        tech_stack.append('Cloudflare')
+        logger.debug("Detected Cloudflare in website headers for %s", company_name)
+    return tech_stack
+
+def parse_company_pages(payload):
+    """Parse one company's fetched pages into plain dicts; the parse stage of the scrape pipeline.
+
+    payload holds the raw 'wiki_html' and 'website_html' (either may be missing), the resolved
+    'website', its response 'website_headers' and the 'parser' to use. Returns the extracted
+    'wiki' and 'website' fields plus (stage, milliseconds) 'timings' for the parent's metrics.
+    """
+    company_name = payload['company']
+    parser = payload.get('parser') or DEFAULT_HTML_PARSER
+    timings = []
+    result = {'company': company_name, 'wiki': None, 'website': None, 'timings': timings}
+
+    if payload.get('wiki_html'):
+        start = time.perf_counter()
+        soup = BeautifulSoup(payload['wiki_html'], parser, parse_only=WIKIPEDIA_PARSE_ONLY)
+        document = WikipediaDocument(soup, parser)
+        fields = extract_wikipedia_fields(document, company_name, parser)
+        timings.append(('parse', (time.perf_counter() - start) * 1000))
+        tech_stack = []
+        try:
+            start = time.perf_counter()
+            tech_stack = extract_wikipedia_tech_stack(document, company_name, parser)
+            timings.append(('tech_detection', (time.perf_counter() - start) * 1000))
+        except Exception as e:
+            logger.error(f"Error scraping Wikipedia tech stack for {company_name}: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
+        result['wiki'] = {**fields, 'tech_stack': tech_stack}
+
+    if payload.get('website_html'):
+        start = time.perf_counter()
+        soup = BeautifulSoup(payload['website_html'], parser, parse_only=WEBSITE_PARSE_ONLY)
+        timings.append(('parse', (time.perf_counter() - start) * 1000))
+        start = time.perf_counter()
+        tech_stack = detect_website_tech(soup, company_name)
+        timings.append(('tech_detection', (time.perf_counter() - start) * 1000))
+        detect_header_tech(tech_stack, payload.get('website_headers') or {}, company_name)
+        result['website'] = {'logo': find_website_logo(soup, company_name, payload['website']), 'tech_stack': tech_stack}
+
+    return result
+
+def init_parse_worker(log_queue, level):
+    """Process-pool initializer: send this worker's log records to the parent through log_queue."""
+    root = logging.getLogger()
+    root.handlers[:] = [QueueHandler(log_queue)]
+    root.setLevel(level)
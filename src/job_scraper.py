@@ -2,9 +2,14 @@ import requests
 from bs4 import BeautifulSoup
 import pymongo
 import time
-import random
-from urllib.parse import quote
+import os
+import asyncio
+import hashlib
+from datetime import datetime, UTC
+from urllib.parse import quote, urlparse, parse_qs
 import logging
+from mongo_buffer import BulkWriteBuffer
+from rate_limit import AdaptiveRateLimiter, send_with_limiter, send_with_limiter_async
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -19,54 +24,68 @@ def connect_to_mongodb_atlas():
         db = client["job_listings"]  # Database name
         collection = db["jobs"]      # Collection name
         logger.info("Connected to MongoDB Atlas successfully")
+        ensure_job_indexes(collection)
         return collection
     except Exception as e:
         logger.error(f"Failed to connect to MongoDB Atlas: {e}")
         raise
 
-# Function to scrape job listings from Indeed for a given company
-def scrape_jobs(company_name):
+INDEED_BASE_URL = "https://www.indeed.com/jobs"
+INDEED_PAGE_SIZE = 10  # Indeed's start= offset advances by 10 results per page
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Build the Indeed search URL for a company and result offset
+def build_search_url(company_name, start=0):
+    url = f"{INDEED_BASE_URL}?q=company%3A{quote(company_name)}"
+    return f"{url}&start={start}" if start else url
+
+# Function to parse job cards out of one Indeed results page; returns (jobs, has_next_page)
+def parse_job_page(html, company_name):
     jobs = []
-    base_url = "https://www.indeed.com/jobs"
-    query = f"{quote(company_name)}"
-    url = f"{base_url}?q=company%3A{query}"
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Find job cards (Indeed's job listing structure as of 2025)
+    job_cards = soup.find_all('div', class_='job_seen_beacon')
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+    for card in job_cards:
+        try:
+            title = card.find('h2', class_='jobTitle').text.strip() if card.find('h2', class_='jobTitle') else 'N/A'
+            location = card.find('div', class_='companyLocation').text.strip() if card.find('div', class_='companyLocation') else 'N/A'
+            description = card.find('div', class_='job-snippet').text.strip() if card.find('div', class_='job-snippet') else 'N/A'
+            link = card.find('a', class_='jcs-JobTitle')['href'] if card.find('a', class_='jcs-JobTitle') else 'N/A'
+            full_link = f"https://www.indeed.com{link}" if link != 'N/A' else 'N/A'
+            
+            job = {
+                'company': company_name,
+                'title': title,
+                'location': location,
+                'description': description,
+                'link': full_link,
+                'scraped_at': time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+            }
+            jobs.append(job)
+        except AttributeError as e:
+            logger.warning(f"Failed to parse a job card for {company_name}: {e}")
+            continue
+    
+    has_next_page = soup.find('a', attrs={'data-testid': 'pagination-page-next'}) is not None
+    return jobs, has_next_page
+
+# Function to scrape job listings from Indeed for a given company; with a limiter, the request is paced per host
+def scrape_jobs(company_name, limiter=None):
+    url = build_search_url(company_name)
     
     try:
         # Send HTTP request
-        response = requests.get(url, headers=headers, timeout=10)
+        if limiter:
+            response = send_with_limiter(lambda: requests.get(url, headers=HEADERS, timeout=10), limiter, url)
+        else:
+            response = requests.get(url, headers=HEADERS, timeout=10)
         response.raise_for_status()  # Raise exception for bad status codes
         
-        # Parse HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find job cards (Indeed's job listing structure as of 2025)
-        job_cards = soup.find_all('div', class_='job_seen_beacon')
-        
-        for card in job_cards:
-            try:
-                title = card.find('h2', class_='jobTitle').text.strip() if card.find('h2', class_='jobTitle') else 'N/A'
-                location = card.find('div', class_='companyLocation').text.strip() if card.find('div', class_='companyLocation') else 'N/A'
-                description = card.find('div', class_='job-snippet').text.strip() if card.find('div', class_='job-snippet') else 'N/A'
-                link = card.find('a', class_='jcs-JobTitle')['href'] if card.find('a', class_='jcs-JobTitle') else 'N/A'
-                full_link = f"https://www.indeed.com{link}" if link != 'N/A' else 'N/A'
-                
-                job = {
-                    'company': company_name,
-                    'title': title,
-                    'location': location,
-                    'description': description,
-                    'link': full_link,
-                    'scraped_at': time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
-                }
-                jobs.append(job)
-            except AttributeError as e:
-                logger.warning(f"Failed to parse a job card for {company_name}: {e}")
-                continue
-                
+        jobs, _ = parse_job_page(response.text, company_name)
         logger.info(f"Scraped {len(jobs)} jobs for {company_name}")
         return jobs
     
@@ -74,6 +93,99 @@ def scrape_jobs(company_name):
         logger.error(f"Failed to scrape jobs for {company_name}: {e}")
         return []
 
+# Async, paginated scrape of one company's listings; each page's jobs are handed to on_jobs as soon as they are parsed
+# on_complete(company_name, fingerprints) is only called when every page fetched cleanly and the last one was reached
+async def scrape_jobs_async(session, company_name, semaphore, limiter, max_pages=5, on_jobs=None, on_complete=None):
+    seen_links = set()
+    fingerprints = set()
+    complete = True
+    total = 0
+    pages = 0
+    max_pages = max(1, max_pages)
+    for page in range(max_pages):
+        url = build_search_url(company_name, start=page * INDEED_PAGE_SIZE)
+        try:
+            async with semaphore:
+                response = await send_with_limiter_async(
+                    lambda: session.get(url, headers=HEADERS, timeout=10), limiter, url
+                )
+            response.raise_for_status()
+            jobs, has_next_page = await asyncio.to_thread(parse_job_page, response.text, company_name)
+        except requests.RequestException as e:
+            logger.error(f"Failed to scrape jobs page {page + 1} for {company_name}: {e}")
+            complete = False
+            break
+        pages += 1
+
+        # Indeed repeats sponsored listings across pages; keep the first occurrence only
+        new_jobs = [job for job in jobs if job['link'] == 'N/A' or job['link'] not in seen_links]
+        seen_links.update(job['link'] for job in new_jobs)
+        total += len(new_jobs)
+        fingerprints.update(job_fingerprint(job) for job in new_jobs)
+        if new_jobs and on_jobs:
+            on_jobs(new_jobs)
+        # Past the last page Indeed keeps serving the final results, so stop once nothing new arrives
+        if not new_jobs or not has_next_page:
+            break
+    else:
+        # Stopped at max_pages with more pages left: listings beyond them were not seen, not closed
+        logger.info(f"Reached {max_pages} pages for {company_name} with more results left; not closing unseen listings")
+        complete = False
+    logger.info(f"Scraped {total} jobs for {company_name} across {pages} page(s)")
+    if complete and on_complete:
+        on_complete(company_name, fingerprints)
+    return total
+
+# Scrape many companies concurrently under a global concurrency cap and per-host rate limit
+async def scrape_all_jobs_async(companies, on_jobs=None, on_complete=None, concurrency=8, host_delay=1.0, max_pages=5):
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = AdaptiveRateLimiter(host_delay)
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount('https://', adapter)
+    start_time = time.time()
+    try:
+        results = await asyncio.gather(
+            *(scrape_jobs_async(session, company, semaphore, limiter, max_pages=max_pages, on_jobs=on_jobs, on_complete=on_complete)
+              for company in companies),
+            return_exceptions=True
+        )
+    finally:
+        session.close()
+    total = 0
+    for company, result in zip(companies, results):
+        if isinstance(result, Exception):
+            logger.error(f"Job scrape task failed for {company}: {result}")
+        else:
+            total += result
+    logger.info(f"Scraped {total} jobs for {len(companies)} companies in {time.time() - start_time:.1f}s")
+    return total
+
+# Unique fingerprint index makes job writes idempotent; legacy documents without one are left out of it
+def ensure_job_indexes(collection):
+    try:
+        collection.create_index(
+            'fingerprint',
+            unique=True,
+            partialFilterExpression={'fingerprint': {'$exists': True}},
+            name='fingerprint_unique'
+        )
+        collection.create_index([('company', pymongo.ASCENDING), ('status', pymongo.ASCENDING)], name='company_status')
+    except Exception as e:
+        logger.warning(f"Failed to ensure job indexes: {e}")
+
+# Canonical job link: Indeed's jk job key, ignoring tracking parameters that change between runs
+def canonical_job_link(link):
+    if not link or link == 'N/A':
+        return ''
+    job_key = parse_qs(urlparse(link).query).get('jk')
+    return job_key[0] if job_key else link
+
+# Stable identity of a listing across runs
+def job_fingerprint(job):
+    parts = [job.get('company', ''), job.get('title', ''), job.get('location', ''), canonical_job_link(job.get('link'))]
+    return hashlib.sha1('\x1f'.join(part.strip().lower() for part in parts).encode('utf-8')).hexdigest()
+
 # Function to read companies from file
 def read_companies(file_path):
     try:
@@ -88,38 +200,72 @@ def read_companies(file_path):
         logger.error(f"Error reading {file_path}: {e}")
         raise
 
-# Function to store jobs in MongoDB Atlas
-def store_jobs(collection, jobs):
+# Function to queue idempotent job upserts for batched storage in MongoDB Atlas
+# Unchanged listings produce no-op updates, so only new, changed or reopened jobs are written
+def store_jobs(buffer, jobs):
     try:
         if jobs:
-            collection.insert_many(jobs, ordered=False)
-            logger.info(f"Stored {len(jobs)} jobs in MongoDB Atlas")
+            for job in jobs:
+                # The link's tracking parameters change every run, so it is only written on insert
+                fields = {k: v for k, v in job.items() if k not in ('scraped_at', 'link')}
+                fields['fingerprint'] = job_fingerprint(job)
+                fields['status'] = 'open'
+                on_insert = {'link': job.get('link'), 'scraped_at': job.get('scraped_at'), 'first_seen': datetime.now(UTC)}
+                buffer.add(pymongo.UpdateOne(
+                    {'fingerprint': fields['fingerprint']},
+                    {'$set': fields, '$setOnInsert': on_insert, '$unset': {'closed_at': ''}},
+                    upsert=True
+                ))
+            logger.info(f"Queued {len(jobs)} jobs for MongoDB Atlas")
         else:
             logger.info("No jobs to store")
-    except pymongo.errors.BulkWriteError as e:
-        logger.warning(f"Some jobs failed to insert (possible duplicates): {e}")
     except Exception as e:
         logger.error(f"Failed to store jobs in MongoDB Atlas: {e}")
 
+# Mark a company's open listings that were not seen in this run as closed
+def close_missing_jobs(buffer, company_name, seen_fingerprints):
+    buffer.add(pymongo.UpdateMany(
+        {'company': company_name, 'status': 'open', 'fingerprint': {'$nin': list(seen_fingerprints)}},
+        {'$set': {'status': 'closed', 'closed_at': datetime.now(UTC)}}
+    ))
+
 # Main function
 def main():
     companies_file = "companies.txt"
     collection = connect_to_mongodb_atlas()
+    # Jobs from many companies are written together in bulk_write batches
+    buffer = BulkWriteBuffer(collection, batch_size=500, flush_interval=10.0, name='jobs')
     
     # Read companies from file
     companies = read_companies(companies_file)
     
+    if os.getenv('JOB_SCRAPER_ASYNC', '1') == '1':
+        # Concurrent, paginated mode: jobs stream into the write buffer as each page is parsed
+        asyncio.run(scrape_all_jobs_async(
+            companies,
+            on_jobs=lambda jobs: store_jobs(buffer, jobs),
+            on_complete=lambda company, fingerprints: close_missing_jobs(buffer, company, fingerprints),
+            concurrency=int(os.getenv('JOB_SCRAPER_CONCURRENCY', '8')),
+            host_delay=float(os.getenv('JOB_SCRAPER_HOST_DELAY', '1.0')),
+            max_pages=int(os.getenv('JOB_SCRAPER_MAX_PAGES', '5'))
+        ))
+        buffer.close()
+        return
+    
+    # Respectful scraping: Indeed is paced by the adaptive limiter instead of fixed random sleeps
+    limiter = AdaptiveRateLimiter(float(os.getenv('JOB_SCRAPER_HOST_DELAY', '2.0')))
     for company in companies:
         logger.info(f"Scraping jobs for {company}")
         
         # Scrape jobs
-        jobs = scrape_jobs(company)
+        jobs = scrape_jobs(company, limiter)
         
         # Store jobs in MongoDB Atlas
-        store_jobs(collection, jobs)
-        
-        # Respectful scraping: random delay between 2-5 seconds
-        time.sleep(random.uniform(2, 5))
+        # Only the first page is fetched here, so unseen listings are left open; the async mode closes them
+        store_jobs(buffer, jobs)
+    
+    # Flush any jobs still waiting in the buffer
+    buffer.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,117 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BulkWriteBuffer:
+    """Write-behind buffer that batches MongoDB write operations into bulk_write calls.
+
+    Operations are flushed when batch_size of them are pending or flush_interval seconds have
+    passed since the last flush, whichever comes first. close() flushes whatever is left.
+    If a whole bulk_write fails (network error, no reachable primary), its operations stay
+    pending and are retried by the next flush; after max_retries failed flushes in a row they
+    are dropped and counted as failed.
+    """
+    def __init__(self, collection, batch_size=100, flush_interval=5.0, name='mongo', metrics=None, max_retries=5):
+        self.collection = collection
+        self.metrics = metrics  # optional object with observe(stage, duration_ms)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.name = name
+        self.max_retries = max(1, max_retries)
+        self._ops = []
+        self._failed_flushes = 0  # consecutive flushes whose bulk_write raised
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.batches = 0
+        self.operations = 0
+        self.failed = 0  # operations that will never be written: rejected, or dropped after max_retries
+        self.total_latency_ms = 0.0
+        self._flusher = None
+        if flush_interval and flush_interval > 0:
+            self._flusher = threading.Thread(target=self._run, name=f"{name}-flusher", daemon=True)
+            self._flusher.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def add(self, operation):
+        """Queue one write operation, flushing immediately if the batch is full."""
+        with self._lock:
+            self._ops.append(operation)
+            full = len(self._ops) >= self.batch_size
+        if full:
+            self.flush()
+
+    def extend(self, operations):
+        for operation in operations:
+            self.add(operation)
+
+    def flush(self):
+        """Send all pending operations in one unordered bulk_write and log the batch latency.
+
+        Returns True when every operation pending at the call was written, False if the batch
+        failed (it is then kept for the next flush) or some of its operations were rejected.
+        """
+        with self._flush_lock:
+            with self._lock:
+                ops, self._ops = self._ops, []
+            if not ops:
+                return True
+            start_time = time.time()
+            result = None
+            # Imported here so that loading this module does not pull in pymongo
+            from pymongo.errors import BulkWriteError
+            try:
+                result = self.collection.bulk_write(ops, ordered=False)
+            except BulkWriteError as e:
+                details = e.details or {}
+                errors = details.get('writeErrors', [])
+                self.failed += len(errors)
+                logger.warning(f"[{self.name}] {len(errors)}/{len(ops)} operations failed in bulk write: {errors[:3]}")
+            except Exception as e:
+                self._failed_flushes += 1
+                if self._failed_flushes >= self.max_retries:
+                    self._failed_flushes = 0
+                    self.failed += len(ops)
+                    logger.error(f"[{self.name}] Bulk write of {len(ops)} operations failed {self.max_retries} times, "
+                                 f"dropping them: {e}")
+                    return False
+                with self._lock:
+                    self._ops[:0] = ops
+                logger.error(f"[{self.name}] Bulk write of {len(ops)} operations failed, keeping them for retry "
+                             f"({self._failed_flushes}/{self.max_retries}): {e}")
+                return False
+            self._failed_flushes = 0
+            duration = (time.time() - start_time) * 1000
+            self.batches += 1
+            self.operations += len(ops)
+            self.total_latency_ms += duration
+            if self.metrics:
+                self.metrics.observe('mongo_write', duration)
+            if result is not None:
+                logger.info(f"[{self.name}] Flushed {len(ops)} operations in {duration:.2f}ms "
+                            f"(upserted={result.upserted_count}, modified={result.modified_count}, inserted={result.inserted_count})")
+            return result is not None
+
+    def stats(self):
+        """Return cumulative batch counts and latency."""
+        return {
+            'batches': self.batches,
+            'operations': self.operations,
+            'failed': self.failed,
+            'pending': len(self._ops),
+            'avg_batch_latency_ms': round(self.total_latency_ms / self.batches, 2) if self.batches else 0.0
+        }
+
+    def close(self):
+        """Stop the background flusher and write any pending operations."""
+        self._stop.set()
+        if self._flusher:
+            self._flusher.join(timeout=self.flush_interval + 1)
+        self.flush()
+        logger.info(f"[{self.name}] Write buffer closed: {self.stats()}")
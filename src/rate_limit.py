@@ -0,0 +1,231 @@
+import asyncio
+import email.utils
+import logging
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request to a host whose circuit breaker is open."""
+
+
+def parse_retry_after(value):
+    """Return the delay in seconds from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class _HostState:
+    __slots__ = ('interval', 'next_slot', 'blocked_until', 'latency_ms', 'samples', 'failures', 'open_until', 'probing')
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.next_slot = 0.0  # theoretical arrival time of the next request (monotonic clock)
+        self.blocked_until = 0.0  # set from Retry-After
+        self.latency_ms = None  # moving average of healthy responses
+        self.samples = 0
+        self.failures = 0  # consecutive
+        self.open_until = 0.0
+        self.probing = 0.0  # when the half-open probe was let through, 0 if none is in flight
+
+
+class AdaptiveRateLimiter:
+    """Thread-safe per-host token bucket whose rate follows each host's responses, plus a circuit breaker.
+
+    Every host starts at one request per min_interval seconds (host_intervals overrides it per host)
+    with a bucket of burst tokens. Healthy responses shorten the interval step by step down to
+    min_fraction of the starting one; 429/503 responses and latency spikes lengthen it, and a
+    Retry-After header pauses the host for as long as it asks. After failure_threshold consecutive
+    failures (connection errors or 5xx) the host's circuit opens: requests fail fast with
+    CircuitOpenError for open_seconds, then one probe request decides whether it closes again.
+    A probe that never reports back, e.g. because the caller failed before sending it, is given up
+    after another open_seconds so the host is not blocked for good.
+    """
+    BACKOFF_STATUSES = {429, 503}
+    # Slowest pace a throttled host is pushed back to when its configured interval is (near) zero
+    BACKOFF_FLOOR = 0.5
+
+    def __init__(self, min_interval=1.0, host_intervals=None, burst=1, min_fraction=0.25, speedup=0.95,
+                 slowdown=2.0, max_interval=60.0, latency_factor=3.0, failure_threshold=5, open_seconds=60.0):
+        self.min_interval = min_interval
+        self.host_intervals = dict(host_intervals or {})
+        self.burst = max(1, burst)
+        self.min_fraction = min_fraction
+        self.speedup = speedup
+        self.slowdown = slowdown
+        self.max_interval = max_interval
+        self.latency_factor = latency_factor
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _base_interval(self, host):
+        return self.host_intervals.get(host, self.min_interval)
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self._base_interval(host))
+        return state
+
+    def reserve(self, host):
+        """Claim the host's next request slot and return the seconds to wait for it.
+
+        Raises CircuitOpenError while the host's circuit is open.
+        """
+        if not host:
+            return 0.0
+        with self._lock:
+            state = self._state(host)
+            now = time.monotonic()
+            if state.open_until:
+                if now < state.open_until or self._probe_in_flight(state, now):
+                    raise CircuitOpenError(f"Circuit open for {host} after {state.failures} consecutive failures")
+                # Half-open: this request is the probe
+                state.probing = now
+                logger.info(f"Probing {host} after its circuit was open for {self.open_seconds:g}s")
+            # GCRA form of the token bucket: a request may start up to burst - 1 intervals early
+            slot = max(now, state.blocked_until, state.next_slot - (self.burst - 1) * state.interval)
+            state.next_slot = max(state.next_slot, slot) + state.interval
+        return slot - now
+
+    def _probe_in_flight(self, state, now):
+        return bool(state.probing) and now - state.probing < self.open_seconds
+
+    def cancel(self, host):
+        """Hand back a reserved slot's probe for a request that was never sent, without counting an outcome."""
+        if not host:
+            return
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is not None:
+                state.probing = 0.0
+
+    def wait(self, host):
+        """Block until host may be sent its next request."""
+        delay = self.reserve(host)
+        if delay > 0:
+            logger.debug("Rate limiting %s for %.2fs", host, delay)
+            time.sleep(delay)
+
+    async def wait_async(self, host):
+        """Asynchronous wait(): sleeps without blocking the event loop."""
+        delay = self.reserve(host)
+        if delay > 0:
+            logger.debug("Rate limiting %s for %.2fs", host, delay)
+            await asyncio.sleep(delay)
+
+    def record(self, host, status=None, latency_ms=None, retry_after=None, error=False):
+        """Adapt host's pace to a request's outcome: its status code, or error=True if it got no response."""
+        if not host:
+            return
+        with self._lock:
+            state = self._state(host)
+            base = self._base_interval(host)
+            failed = error or (status is not None and status >= 500)
+            throttled = status in self.BACKOFF_STATUSES
+            spike = (latency_ms is not None and state.samples >= 5
+                     and latency_ms > self.latency_factor * state.latency_ms)
+            if throttled or spike:
+                state.interval = min(self.max_interval, max(state.interval * self.slowdown, base, self.BACKOFF_FLOOR))
+                logger.info(f"Slowing down {host} to one request per {state.interval:.2f}s "
+                            f"({'HTTP ' + str(status) if throttled else f'latency {latency_ms:.0f}ms'})")
+            elif not failed:
+                state.interval = max(base * self.min_fraction, state.interval * self.speedup)
+            if latency_ms is not None and not failed and not throttled:
+                state.latency_ms = latency_ms if state.latency_ms is None else 0.8 * state.latency_ms + 0.2 * latency_ms
+                state.samples += 1
+            if retry_after:
+                state.blocked_until = max(state.blocked_until, time.monotonic() + retry_after)
+                logger.info(f"{host} asked to retry after {retry_after:.0f}s")
+
+            if failed:
+                state.failures += 1
+                if state.probing or state.failures >= self.failure_threshold:
+                    state.open_until = time.monotonic() + self.open_seconds
+                    state.probing = 0.0
+                    logger.warning(f"Circuit opened for {host} after {state.failures} consecutive failures; "
+                                   f"pausing it for {self.open_seconds:g}s")
+            else:
+                if state.open_until:
+                    logger.info(f"Circuit closed for {host}")
+                state.failures = 0
+                state.open_until = 0.0
+                state.probing = 0.0
+
+    def stats(self):
+        """Return each host's current interval, latency average and breaker state."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                host: {
+                    'interval_s': round(state.interval, 3),
+                    'avg_latency_ms': round(state.latency_ms, 1) if state.latency_ms is not None else None,
+                    'consecutive_failures': state.failures,
+                    'circuit_open': bool(state.open_until) and (now < state.open_until or self._probe_in_flight(state, now))
+                }
+                for host, state in self._hosts.items()
+            }
+
+
+def _should_retry(response, attempt, max_attempts):
+    return response.status_code in AdaptiveRateLimiter.BACKOFF_STATUSES and attempt < max_attempts
+
+
+def send_with_limiter(send, limiter, url, max_attempts=3):
+    """Call send() under limiter for url's host and report the outcome.
+
+    A 429/503 answer is retried, after the wait the limiter now imposes on the host (including
+    any Retry-After), until max_attempts; the last response is returned either way.
+    """
+    host = urlparse(url).netloc
+    for attempt in range(1, max_attempts + 1):
+        limiter.wait(host)
+        start = time.perf_counter()
+        try:
+            response = send()
+        except Exception:
+            limiter.record(host, error=True)
+            raise
+        limiter.record(host, response.status_code, (time.perf_counter() - start) * 1000,
+                       parse_retry_after(response.headers.get('Retry-After')))
+        if not _should_retry(response, attempt, max_attempts):
+            return response
+        logger.info(f"{host} answered {response.status_code}, retrying {url} (attempt {attempt + 1}/{max_attempts})")
+        response.close()
+
+
+async def send_with_limiter_async(send, limiter, url, max_attempts=3):
+    """Asynchronous send_with_limiter(): waits on the event loop and runs the blocking send() in a thread."""
+    host = urlparse(url).netloc
+    for attempt in range(1, max_attempts + 1):
+        await limiter.wait_async(host)
+        start = time.perf_counter()
+        try:
+            response = await asyncio.to_thread(send)
+        except asyncio.CancelledError:
+            limiter.cancel(host)
+            raise
+        except Exception:
+            limiter.record(host, error=True)
+            raise
+        limiter.record(host, response.status_code, (time.perf_counter() - start) * 1000,
+                       parse_retry_after(response.headers.get('Retry-After')))
+        if not _should_retry(response, attempt, max_attempts):
+            return response
+        logger.info(f"{host} answered {response.status_code}, retrying {url} (attempt {attempt + 1}/{max_attempts})")
+        response.close()
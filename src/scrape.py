@@ -1,120 +1,1157 @@
 import requests
 from bs4 import BeautifulSoup
-import pymongo
-import pandas as pd
 from urllib.parse import urlparse
 import re
 import time
-from datetime import datetime, UTC
+from datetime import datetime, timedelta, UTC
 import logging
 import os
 from dotenv import load_dotenv
+from mongo_buffer import BulkWriteBuffer
+from rate_limit import AdaptiveRateLimiter, send_with_limiter
+from crawl_archive import CrawlArchive, ArchiveReader, ReplaySession, archive_url, DROPPED_HEADERS
+from work_queue import MongoWorkQueue
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-import traceback
 import ssl
-import certifi
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-import selenium.common.exceptions
 import sys
-import socket
 import shutil
+import threading
+import json
+import hashlib
+import unicodedata
+from requests.structures import CaseInsensitiveDict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from collections import OrderedDict
+import itertools
+import collections
+from contextlib import contextmanager
+import queue
+import csv
+import atexit
+from logging.handlers import QueueHandler, QueueListener
+import multiprocessing
+from extractors import (
+    DEFAULT_HTML_PARSER, WEBSITE_PARSE_ONLY, WIKIPEDIA_PARSE_ONLY, WikipediaDocument, normalize_website, clean_text,
+    has_infobox, infobox_website, extract_wikipedia_fields, extract_wikipedia_tech_stack, find_website_logo,
+    detect_website_tech, detect_header_tech, parse_company_pages, init_parse_worker
+)
 
 # Load environment variables
 load_dotenv()
 
+def configure_logging(level=None, log_file='scrape.log'):
+    """Route log records through a queue so scraper threads never block on console or file I/O.
+
+    Does nothing if the root logger is already configured (e.g. by an embedding script).
+    """
+    root = logging.getLogger()
+    # Parse worker processes log through the parent's queue instead (see init_parse_worker)
+    if root.handlers or multiprocessing.parent_process() is not None:
+        return None
+    level = (level or os.getenv('SCRAPER_LOG_LEVEL', 'INFO')).upper()
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    handlers = [logging.StreamHandler(), logging.FileHandler(log_file)]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
 # Set up logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('scrape.log')
-    ]
-)
+configure_logging()
 logger = logging.getLogger('scrape')
 
-# Log Python, pymongo, and OpenSSL versions
-logger.debug(f"Python version: {sys.version}")
-logger.debug(f"pymongo version: {pymongo.__version__}")
-logger.debug(f"OpenSSL version: {ssl.OPENSSL_VERSION}")
+# Log Python and OpenSSL versions; pymongo and selenium are imported lazily, only when they are used
+logger.debug("Python version: %s", sys.version)
+logger.debug("OpenSSL version: %s", ssl.OPENSSL_VERSION)
+
+class StageMetrics:
+    """Thread-safe per-stage latency histograms, exportable as JSON or Prometheus text."""
+    BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def observe(self, stage, duration_ms):
+        with self._lock:
+            data = self._stages.get(stage)
+            if data is None:
+                data = self._stages[stage] = {'count': 0, 'sum': 0.0, 'max': 0.0, 'buckets': [0] * (len(self.BUCKETS_MS) + 1)}
+            data['count'] += 1
+            data['sum'] += duration_ms
+            data['max'] = max(data['max'], duration_ms)
+            for i, bound in enumerate(self.BUCKETS_MS):
+                if duration_ms <= bound:
+                    data['buckets'][i] += 1
+                    break
+            else:
+                data['buckets'][-1] += 1
 
-class CompanyScraper:
-    def __init__(self, mongodb_uri, database_name='company_db', collection_name='scraper_results', skip_mongodb=False):
-        """Initialize MongoDB connection and scraper settings with enhanced retry and diagnostics."""
-        self.skip_mongodb = skip_mongodb
-        self.results = []  # Store scraped data in memory
-        if not skip_mongodb:
-            logger.debug(f"Attempting MongoDB connection with URI: {mongodb_uri[:50]}... (truncated for logs)")
-            # Test network connectivity to MongoDB cluster
-            cluster_host = mongodb_uri.split('@')[-1].split('/')[0].split(',')[0].split(':')[0]
-            try:
-                socket.create_connection((cluster_host, 27017), timeout=5)
-                logger.debug(f"Network connectivity test to {cluster_host}:27017 succeeded")
-            except socket.error as e:
-                logger.warning(f"Network connectivity test to {cluster_host}:27017 failed: {e}")
-            max_retries = 5
-            retry_delay = 10
-            for attempt in range(1, max_retries + 1):
+    @contextmanager
+    def time(self, stage):
+        """Time the enclosed block and record it under stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, (time.perf_counter() - start) * 1000)
+
+    def _quantile(self, data, q):
+        """Approximate a quantile as the upper bound of the bucket that contains it."""
+        target = q * data['count']
+        seen = 0
+        for bound, count in zip(self.BUCKETS_MS + [data['max']], data['buckets']):
+            seen += count
+            if seen >= target:
+                return min(bound, data['max'])
+        return data['max']
+
+    def snapshot(self):
+        """Return {stage: summary} with counts, totals, approximate quantiles and bucket counts."""
+        with self._lock:
+            stages = {stage: {**data, 'buckets': list(data['buckets'])} for stage, data in self._stages.items()}
+        summary = {}
+        for stage, data in sorted(stages.items()):
+            summary[stage] = {
+                'count': data['count'],
+                'sum_ms': round(data['sum'], 3),
+                'avg_ms': round(data['sum'] / data['count'], 3) if data['count'] else 0.0,
+                'p50_ms': self._quantile(data, 0.5),
+                'p95_ms': self._quantile(data, 0.95),
+                'max_ms': round(data['max'], 3),
+                'buckets': {str(bound): count for bound, count in zip(self.BUCKETS_MS + ['+Inf'], data['buckets'])}
+            }
+        return summary
+
+    def to_prometheus(self, name='scraper_stage_duration_seconds'):
+        """Render the histograms in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {name} Latency of each company scraper stage.",
+            f"# TYPE {name} histogram"
+        ]
+        with self._lock:
+            stages = {stage: {**data, 'buckets': list(data['buckets'])} for stage, data in self._stages.items()}
+        for stage, data in sorted(stages.items()):
+            cumulative = 0
+            for bound, count in zip(self.BUCKETS_MS + [None], data['buckets']):
+                cumulative += count
+                le = '+Inf' if bound is None else f"{bound / 1000:g}"
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {data["sum"] / 1000:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {data["count"]}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path):
+        """Write metrics to path; a .prom or .txt extension selects Prometheus text, anything else JSON."""
+        if path.endswith(('.prom', '.txt')):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.snapshot(), indent=2)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        logger.info("Wrote stage metrics to %s", path)
+
+class HttpCache:
+    """On-disk GET response cache with ETag/Last-Modified revalidation, a freshness TTL and size-bounded eviction."""
+
+    def __init__(self, cache_dir, ttl=86400, max_bytes=500 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(os.path.getsize(os.path.join(cache_dir, f)) for f in os.listdir(cache_dir))
+        logger.debug("HTTP cache at %s holds %.1f KiB", cache_dir, self._size / 1024)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.json", f"{base}.body"
+
+    def load(self, url):
+        """Return (metadata, body) for a cached URL, or (None, None) if absent or unreadable."""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+            os.utime(meta_path)  # Mark as recently used for eviction
+            return meta, body
+        except (OSError, ValueError):
+            return None, None
+
+    def is_fresh(self, meta):
+        return time.time() - meta['stored_at'] < self.ttl
+
+    def conditional_headers(self, meta):
+        """Build If-None-Match/If-Modified-Since headers from stored validators."""
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def store(self, url, response):
+        """Persist a successful response body plus its validators."""
+        meta_path, body_path = self._paths(url)
+        body = response.content
+        meta = {
+            'url': url,
+            'final_url': response.url,
+            'status': response.status_code,
+            'encoding': response.encoding,
+            'headers': {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS},
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'stored_at': time.time()
+        }
+        old_size = sum(os.path.getsize(path) for path in (meta_path, body_path) if os.path.exists(path))
+        for path, data, mode in ((body_path, body, 'wb'), (meta_path, json.dumps(meta), 'w')):
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, mode) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        with self._lock:
+            self._size += os.path.getsize(meta_path) + len(body) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def touch(self, url, meta):
+        """Restart the freshness window of an entry after a 304 Not Modified."""
+        meta['stored_at'] = time.time()
+        meta_path, _ = self._paths(url)
+        try:
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+        except OSError as e:
+            logger.debug("Failed to refresh cache entry for %s: %s", url, e)
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is back under 90% of max_bytes."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json'):
+                meta_path = os.path.join(self.cache_dir, name)
                 try:
-                    self.client = pymongo.MongoClient(
-                        mongodb_uri,
-                        serverSelectionTimeoutMS=60000,
-                        connectTimeoutMS=30000,
-                        socketTimeoutMS=30000,
-                        heartbeatFrequencyMS=30000,
-                        maxPoolSize=5,
-                        tls=True,
-                        tlsCAFile=certifi.where(),
-                        retryWrites=True,
-                        w='majority',
-                        appName='CompanyScraper'
-                    )
-                    self.db = self.client[database_name]
-                    self.collection = self.db[collection_name]
-                    start_time = time.time()
-                    self.collection.insert_one({'test': 'connection_check', 'timestamp': datetime.now(UTC)})
-                    duration = (time.time() - start_time) * 1000
-                    logger.info(f"Connected to MongoDB successfully, test document inserted to {database_name}.{collection_name} in {duration:.2f}ms")
+                    entries.append((os.path.getmtime(meta_path), meta_path))
+                except OSError:
+                    continue
+        target = self.max_bytes * 0.9
+        for _, meta_path in sorted(entries):
+            if self._size <= target:
+                break
+            body_path = meta_path[:-len('.json')] + '.body'
+            for path in (meta_path, body_path):
+                try:
+                    self._size -= os.path.getsize(path)
+                    os.remove(path)
+                except OSError:
+                    pass
+        logger.debug("HTTP cache evicted down to %.1f KiB", self._size / 1024)
+
+    def build_response(self, meta, body, request):
+        """Rebuild a requests.Response from a cached entry."""
+        response = requests.Response()
+        response.status_code = meta['status']
+        response._content = body
+        response.headers = CaseInsensitiveDict(meta['headers'])
+        response.url = meta.get('final_url') or meta['url']
+        response.encoding = meta.get('encoding')
+        response.reason = 'OK'
+        response.request = request
+        response.from_cache = True
+        return response
+
+class RequestMemo:
+    """Per-run memo of responses by method and URL that also coalesces concurrent identical requests.
+
+    The first caller for a key fetches; callers arriving while that fetch is in flight wait for
+    its outcome (response or exception) instead of sending their own request. Finished responses
+    are kept, least recently used first out, up to max_bytes of bodies. A HEAD is answered from a
+    memoised GET of the same URL, which already carries the headers. Only definite answers are
+    kept: throttled and failed responses are fetched again the next time they are asked for.
+    """
+    MEMO_STATUSES = {304, 404, 410}
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.coalesced = 0
+        self.fetches = 0
+        self._entries = OrderedDict()  # (method, url) -> response
+        self._size = 0
+        self._inflight = {}  # (method, url) -> Future
+        self._lock = threading.Lock()
+
+    @property
+    def saved(self):
+        """Requests answered without going to the network."""
+        return self.hits + self.coalesced
+
+    def _lookup(self, method, url):
+        for key in ((method, url), ('GET', url)) if method == 'HEAD' else ((method, url),):
+            response = self._entries.get(key)
+            if response is not None:
+                self._entries.move_to_end(key)
+                if key[0] != method:
+                    response = self._as_head(response)
+                return response
+        return None
+
+    @staticmethod
+    def _as_head(response):
+        head = requests.Response()
+        head.status_code = response.status_code
+        head.reason = response.reason
+        head.headers = CaseInsensitiveDict(response.headers)
+        head.url = response.url
+        head.encoding = response.encoding
+        head.request = response.request
+        head._content = b''
+        return head
+
+    def _store(self, key, response):
+        if not (200 <= response.status_code < 300 or response.status_code in self.MEMO_STATUSES):
+            return
+        size = len(response.content or b'')
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= len(old.content or b'')
+        self._entries[key] = response
+        self._size += size
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted.content or b'')
+
+    def fetch(self, method, url, send):
+        """Return the response for method and url, calling send() only if no equal request is done or in flight."""
+        key = (method.upper(), url)
+        with self._lock:
+            response = self._lookup(*key)
+            if response is not None:
+                self.hits += 1
+                return response
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.fetches += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            logger.debug("Waiting on in-flight %s %s", *key)
+            return future.result()
+        try:
+            response = send()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._inflight[key]
+            self._store(key, response)
+        future.set_result(response)
+        return response
+
+    def stats(self):
+        with self._lock:
+            return {'fetched': self.fetches, 'memo_hits': self.hits, 'coalesced': self.coalesced,
+                    'saved': self.saved, 'memo_kib': round(self._size / 1024, 1)}
+
+class ScraperSession(requests.Session):
+    """requests.Session that applies adaptive per-host rate limiting and an optional on-disk cache to every request.
+
+    With an archive, every response handed back to the scraper, cached ones included, is also
+    recorded there so the crawl can be replayed offline. With a memo, repeated and concurrent
+    identical requests in the run are answered by a single fetch.
+    """
+    def __init__(self, limiter, cache=None, archive=None, memo=None):
+        super().__init__()
+        self.limiter = limiter
+        self.cache = cache
+        self.archive = archive
+        self.memo = memo
+
+    def _send(self, method, url, *args, **kwargs):
+        return send_with_limiter(lambda: super(ScraperSession, self).request(method, url, *args, **kwargs), self.limiter, url)
+
+    def request(self, method, url, *args, **kwargs):
+        if self.memo is None:
+            return self._fetch(method, url, *args, **kwargs)
+        return self.memo.fetch(method, archive_url(method, url, kwargs.get('params')),
+                               lambda: self._fetch(method, url, *args, **kwargs))
+
+    def _fetch(self, method, url, *args, **kwargs):
+        response = self._request(method, url, *args, **kwargs)
+        if self.archive is not None:
+            self.archive.record_response(method, archive_url(method, url, kwargs.get('params')), response)
+        return response
+
+    def _request(self, method, url, *args, **kwargs):
+        if self.cache is None or method.upper() != 'GET':
+            return self._send(method, url, *args, **kwargs)
+
+        prepared = requests.Request(method, url, params=kwargs.get('params')).prepare()
+        meta, body = self.cache.load(prepared.url)
+        if meta and self.cache.is_fresh(meta):
+            self.cache.hits += 1
+            logger.debug("HTTP cache hit for %s", prepared.url)
+            return self.cache.build_response(meta, body, prepared)
+
+        if meta:
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), **self.cache.conditional_headers(meta)}
+        response = self._send(method, url, *args, **kwargs)
+        if meta and response.status_code == 304:
+            self.cache.revalidated += 1
+            self.cache.touch(prepared.url, meta)
+            logger.debug("HTTP cache revalidated %s (304 Not Modified)", prepared.url)
+            return self.cache.build_response(meta, body, prepared)
+
+        self.cache.misses += 1
+        if response.status_code == 200:
+            self.cache.store(prepared.url, response)
+        return response
+
+class ChromeDriverPool:
+    """Pool of long-lived headless Chrome drivers leased one page at a time and recycled after max_pages.
+
+    Selenium is imported when the first driver is started, not when the pool is created. A
+    worker that finds every driver leased waits until one is returned or discarded; a discarded
+    driver frees its slot, so the next waiter starts a replacement.
+    """
+    def __init__(self, size=2, max_pages=50, user_agent=None, page_load_timeout=30, ready_timeout=10):
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.user_agent = user_agent
+        self.page_load_timeout = page_load_timeout
+        self.ready_timeout = ready_timeout
+        self._idle = []  # most recently returned driver last, so warm drivers are reused first
+        self._pages = {}  # id(driver) -> pages served
+        self._created = 0
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._closed = False
+
+    def _create_driver(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        options = Options()
+        options.add_argument('--headless')
+        options.add_argument('--disable-gpu')
+        if self.user_agent:
+            options.add_argument(f'user-agent={self.user_agent}')
+        driver = webdriver.Chrome(options=options)
+        driver.set_page_load_timeout(self.page_load_timeout)
+        logger.debug("Started headless Chrome driver")
+        return driver
+
+    def _discard(self, driver):
+        self._pages.pop(id(driver), None)
+        with self._available:
+            self._created -= 1
+            self._available.notify()
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug("Error quitting Chrome driver: %s", e)
+
+    @contextmanager
+    def lease(self):
+        """Lease a driver for one page; crashed or worn-out drivers are replaced instead of returned.
+
+        Any exception raised while the driver is leased discards it, since its state is unknown.
+        """
+        with self._available:
+            while True:
+                if self._closed:
+                    raise RuntimeError("ChromeDriverPool is closed")
+                if self._idle:
+                    driver = self._idle.pop()
                     break
-                except Exception as e:
-                    logger.error(f"MongoDB connection attempt {attempt}/{max_retries} failed: {e}\n{traceback.format_exc()}")
-                    if attempt == max_retries:
-                        logger.warning("Max retries reached. Falling back to skip_mongodb=True")
-                        self.skip_mongodb = True
-                        self.collection = None
+                if self._created < self.size:
+                    self._created += 1
+                    driver = None
+                    break
+                self._available.wait()
+        if driver is None:
+            try:
+                driver = self._create_driver()
+            except BaseException:
+                with self._available:
+                    self._created -= 1
+                    self._available.notify()
+                raise
+            self._pages[id(driver)] = 0
+
+        try:
+            yield driver
+        except BaseException:
+            self._discard(driver)
+            raise
+        self._pages[id(driver)] = self._pages.get(id(driver), 0) + 1
+        if self._closed or self._pages[id(driver)] >= self.max_pages:
+            logger.debug("Recycling Chrome driver after %s pages", self._pages[id(driver)])
+            self._discard(driver)
+        else:
+            with self._available:
+                self._idle.append(driver)
+                self._available.notify()
+
+    def wait_until_ready(self, driver):
+        """Block until the DOM has finished loading instead of sleeping a fixed time."""
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.support.ui import WebDriverWait
+        try:
+            WebDriverWait(driver, self.ready_timeout).until(
+                lambda d: d.execute_script('return document.readyState') == 'complete'
+            )
+        except TimeoutException:
+            logger.debug("DOM not ready after %ss, using partially loaded page", self.ready_timeout)
+
+    def close(self):
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._available.notify_all()
+        for driver in idle:
+            self._discard(driver)
+
+class CrawlCheckpoint:
+    """Append-only record of companies completed in a run, so an interrupted crawl resumes where it stopped.
+
+    The first line identifies the target list; a checkpoint written for a different list is ignored.
+    """
+    def __init__(self, path, companies):
+        self.path = path
+        self.targets_hash = hashlib.sha1('\n'.join(companies).encode('utf-8')).hexdigest()
+        self.completed = set()
+        self._pending = []
+        self.write_failures = 0  # the write buffer's failed count as of the last commit
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    header = json.loads(f.readline() or '{}')
+                    if header.get('targets') == self.targets_hash:
+                        self.completed = {json.loads(line)['name'] for line in f if line.strip()}
+                        logger.info(f"Resuming crawl from {path}: {len(self.completed)} companies already done")
                     else:
-                        logger.info(f"Retrying in {retry_delay} seconds...")
-                        time.sleep(retry_delay)
+                        logger.info(f"Checkpoint {path} belongs to a different company list, starting fresh")
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+                self.completed = set()
+        if not self.completed:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'targets': self.targets_hash, 'started_at': datetime.now(UTC).isoformat()}) + '\n')
+
+    def mark(self, company_name):
+        """Record a finished company; it is written to disk by the next commit()."""
+        with self._lock:
+            self._pending.append(company_name)
+
+    def take_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        return pending
+
+    def restore(self, names):
+        """Put names taken by take_pending() back, for a commit that could not go ahead."""
+        with self._lock:
+            self._pending[:0] = names
+
+    def commit(self, names):
+        """Append finished companies to the checkpoint file."""
+        if not names:
+            return
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for name in names:
+                    f.write(json.dumps({'name': name}) + '\n')
+            self.completed.update(names)
+
+    def clear(self):
+        """Remove the checkpoint once the whole list has been processed."""
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+class ResultSpill:
+    """Append-only JSONL store for a run's company records, holding at most window records in memory.
+
+    Used in place of the in-memory results list on long runs: append() buffers records and writes
+    them out window at a time, and iter_batches() streams them back for export.
+    """
+    def __init__(self, path, window=100):
+        self.path = path
+        self.window = max(1, window)
+        self._pending = []
+        self._count = 0
+        self._lock = threading.Lock()
+        # Each run starts a new spill file
+        open(path, 'w', encoding='utf-8').close()
+
+    def append(self, record):
+        with self._lock:
+            self._pending.append(json.dumps(record, ensure_ascii=False, default=str))
+            self._count += 1
+            if len(self._pending) >= self.window:
+                self._write_pending()
+
+    def _write_pending(self):
+        if self._pending:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(self._pending) + '\n')
+            self._pending = []
+
+    def flush(self):
+        with self._lock:
+            self._write_pending()
+
+    def __len__(self):
+        return self._count
+
+    def iter_batches(self, batch_size):
+        """Yield the spilled records in batches, with scraped_at restored to a datetime."""
+        self.flush()
+        batch = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record.get('scraped_at'):
+                    record['scraped_at'] = datetime.fromisoformat(record['scraped_at'])
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+# Columns written by the exporters, in output order
+EXPORT_FIELDS = ['name', 'description', 'employees', 'revenue', 'industries', 'employee_count', 'revenue_usd',
+                 'revenue_year', 'industry_list', 'wiki_title', 'website', 'domain', 'logo', 'tech_stack',
+                 'scraped_at', 'source']
+EXPORT_LIST_FIELDS = {'industry_list', 'tech_stack', 'source'}
+EXPORT_INT_FIELDS = {'employee_count', 'revenue_usd', 'revenue_year'}
+
+def _export_value(value):
+    """Convert a record value into a JSON/CSV-friendly scalar."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+class CsvExportWriter:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'w', encoding='utf-8', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+        self._writer.writeheader()
+
+    def write_batch(self, records):
+        for record in records:
+            row = {}
+            for field in EXPORT_FIELDS:
+                value = record.get(field)
+                row[field] = ', '.join(value) if field in EXPORT_LIST_FIELDS and value else _export_value(value)
+            self._writer.writerow(row)
+
+    def close(self):
+        self._file.close()
+
+class JsonlExportWriter:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def write_batch(self, records):
+        for record in records:
+            row = {field: _export_value(record.get(field)) for field in EXPORT_FIELDS}
+            self._file.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+
+    def close(self):
+        self._file.close()
+
+class ParquetExportWriter:
+    """Writes one Parquet row group per batch; requires pyarrow."""
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.path = path
+        self._pa = pa
+        self._schema = pa.schema([
+            (field, pa.list_(pa.string()) if field in EXPORT_LIST_FIELDS
+             else pa.int64() if field in EXPORT_INT_FIELDS
+             else pa.timestamp('us', tz='UTC') if field == 'scraped_at'
+             else pa.string())
+            for field in EXPORT_FIELDS
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write_batch(self, records):
+        columns = {}
+        for field in EXPORT_FIELDS:
+            values = [record.get(field) for record in records]
+            if field == 'scraped_at':
+                values = [v.replace(tzinfo=UTC) if isinstance(v, datetime) and v.tzinfo is None else v for v in values]
+            elif field in EXPORT_LIST_FIELDS:
+                values = [[str(item) for item in v] if v else [] for v in values]
+            elif field in EXPORT_INT_FIELDS:
+                values = [None if v is None else int(v) for v in values]
+            else:
+                values = [None if v is None else str(v) for v in values]
+            columns[field] = values
+        self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+EXPORT_WRITERS = {
+    'csv': CsvExportWriter,
+    'jsonl': JsonlExportWriter,
+    'parquet': ParquetExportWriter
+}
+
+class WebsiteResolver:
+    """Resolves a company's official website from a curated mapping, the Wikipedia infobox and a persistent cache."""
+    def __init__(self, known_path='company_websites.json', cache_path='websites.json'):
+        self.cache_path = cache_path
+        self.known = self._load(known_path)
+        self.cache = self._load(cache_path)
+        self._lock = threading.Lock()
+        self._dirty = False
+        logger.debug("Website resolver loaded %s known and %s cached websites", len(self.known), len(self.cache))
+
+    @staticmethod
+    def _load(path):
+        if not path or not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load website mapping from {path}: {e}")
+            return {}
+
+    def resolve(self, company_name, wiki_website=None):
+        """Return the website URL for company_name, remembering infobox discoveries for later runs."""
+        website = self.known.get(company_name)
+        if website:
+            return website
+        cached = self.cache.get(company_name)
+        website = normalize_website(wiki_website)
+        if website and (not cached or cached.get('website') != website):
+            with self._lock:
+                self.cache[company_name] = {'website': website, 'domain': urlparse(website).netloc, 'source': 'wikipedia'}
+                self._dirty = True
+            return website
+        return cached.get('website') if cached else None
+
+    def domain(self, company_name):
+        """Return the bare domain (without www.) of the resolved website, if any."""
+        website = self.known.get(company_name) or (self.cache.get(company_name) or {}).get('website')
+        if not website:
+            return None
+        netloc = urlparse(website).netloc
+        return netloc[4:] if netloc.startswith('www.') else netloc
+
+    def save(self):
+        if not self.cache_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.cache, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.cache_path)
+            self._dirty = False
+
+# Browser-like headers for company homepages, some of which refuse unknown clients
+WEBSITE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+CLEARBIT_LOGO_HOST = "logo.clearbit.com"
+
+class LogoCache:
+    """Persistent domain -> Clearbit logo lookup results, remembering misses for a shorter TTL than hits."""
+    def __init__(self, path='logo_cache.json', hit_ttl=30 * 86400, miss_ttl=86400):
+        self.path = path
+        self.hit_ttl = hit_ttl
+        self.miss_ttl = miss_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.entries = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+                logger.debug("Loaded %s cached logo lookups from %s", len(self.entries), path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Failed to load logo cache from {path}: {e}")
+
+    def _is_fresh(self, entry, now):
+        ttl = self.hit_ttl if entry.get('logo') else self.miss_ttl
+        return now - entry.get('checked_at', 0) < ttl
+
+    def __contains__(self, domain):
+        entry = self.entries.get(domain)
+        return bool(entry) and self._is_fresh(entry, time.time())
+
+    def lookup(self, domain):
+        """Return (found, logo_url); found is False when the domain has to be checked again."""
+        entry = self.entries.get(domain)
+        if entry and self._is_fresh(entry, time.time()):
+            self.hits += 1
+            return True, entry.get('logo')
+        self.misses += 1
+        return False, None
+
+    def store(self, domain, logo_url):
+        with self._lock:
+            self.entries[domain] = {'logo': logo_url, 'checked_at': time.time()}
+            self._dirty = True
+
+    def save(self):
+        """Write the cache to disk if it changed, dropping expired entries."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            self.entries = {domain: entry for domain, entry in self.entries.items() if self._is_fresh(entry, now)}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        logger.debug("Saved %s cached logo lookups to %s", len(self.entries), self.path)
+
+WIKIPEDIA_API_URL = "https://en.wikipedia.org/w/api.php"
+WIKIPEDIA_HEADERS = {'User-Agent': 'CompanyScraper/1.0 (pranay@example.com)'}
+# TextExtracts returns at most 20 extracts per query, below the 50-title MediaWiki limit
+WIKIPEDIA_BATCH_SIZE = 20
+WIKIPEDIA_COMPANY_KEYWORDS = ['corporation', 'multinational', 'company', 'founded', 'headquarters']
+
+def wikipedia_search_terms(company_name):
+    """Search terms tried, in order, when looking up a company's Wikipedia article."""
+    return [
+        f"{company_name}, Inc.",
+        f"{company_name} (company)",
+        f"{company_name}",
+        f"{company_name} company"
+    ]
+
+class WikiTitleStore:
+    """Persistent company -> validated Wikipedia title mapping, so later runs skip the search phase."""
+    def __init__(self, path='wiki_titles.json'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.titles = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.titles = json.load(f)
+                logger.debug("Loaded %s resolved Wikipedia titles from %s", len(self.titles), path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Failed to load Wikipedia title map from {path}: {e}")
+
+    def get(self, company_name):
+        return self.titles.get(company_name)
+
+    def set(self, company_name, title):
+        with self._lock:
+            if self.titles.get(company_name) != title:
+                self.titles[company_name] = title
+                self._dirty = True
+
+    def discard(self, company_name):
+        with self._lock:
+            if self.titles.pop(company_name, None) is not None:
+                self._dirty = True
+
+    def save(self):
+        """Write the mapping to disk if it changed."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.titles, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        logger.debug("Saved %s resolved Wikipedia titles to %s", len(self.titles), self.path)
+
+# Company names are unique regardless of case; writes and lookups by name pass the same collation
+NAME_COLLATION = {'locale': 'en', 'strength': 2}
+SEARCH_PREFIX_MAX = 15
+SEARCH_NGRAM = 3
+SEARCH_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+def search_words(text):
+    """Lowercase text, strip accents and split it into alphanumeric words."""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode('ascii').lower()
+    return [word for word in SEARCH_NON_ALNUM_RE.split(text) if word]
+
+def search_tokens(name):
+    """Return the tokens the /companies search matches a name against.
+
+    These are the prefixes (up to SEARCH_PREFIX_MAX characters) of each word and of the whole
+    name with separators removed, plus every trigram of that compact form. A short query is looked
+    up as one prefix token; a longer one needs all of its trigrams, which an index answers.
+    """
+    words = search_words(name)
+    compact = ''.join(words)
+    tokens = set()
+    for word in words + [compact]:
+        tokens.update(word[:i] for i in range(1, min(len(word), SEARCH_PREFIX_MAX) + 1))
+    tokens.update(compact[i:i + SEARCH_NGRAM] for i in range(len(compact) - SEARCH_NGRAM + 1))
+    return sorted(tokens)
+
+# Documents the original connection check inserted into the companies collection; they have no name
+LEGACY_CHECK_DOCUMENT = {'test': 'connection_check'}
+
+COMPANY_INDEXES = [
+    # Only named documents take part, so stray documents without a name cannot collide on null
+    ('name', {'unique': True, 'collation': NAME_COLLATION, 'name': 'name_unique_ci',
+              'partialFilterExpression': {'name': {'$exists': True}}}),
+    ('search_tokens', {'name': 'search_tokens'}),
+    ([('description', 'text'), ('industries', 'text'), ('tech_stack', 'text')],
+     {'weights': {'industries': 5, 'tech_stack': 3, 'description': 1}, 'name': 'company_text'}),
+    ('employee_count', {'name': 'employee_count'}),
+    ('revenue_usd', {'name': 'revenue_usd'}),
+    ('industry_list', {'name': 'industry_list'})
+]
+
+def backfill_search_tokens(collection, batch_size=500):
+    """Write search_tokens on named documents stored before the scraper produced them; returns how many."""
+    from pymongo import UpdateOne
+    updated = 0
+    batch = []
+    for doc in collection.find({'name': {'$exists': True}, 'search_tokens': {'$exists': False}}, {'name': 1}):
+        batch.append(UpdateOne({'_id': doc['_id']}, {'$set': {'search_tokens': search_tokens(doc['name'])}}))
+        if len(batch) >= batch_size:
+            updated += collection.bulk_write(batch, ordered=False).modified_count
+            batch = []
+    if batch:
+        updated += collection.bulk_write(batch, ordered=False).modified_count
+    if updated:
+        logger.info(f"Backfilled search tokens on {updated} companies")
+    return updated
+
+def ensure_company_indexes(collection):
+    """Create the indexes behind lookups by name, search and the size, revenue and industry filters.
+
+    Leftover connection-check documents are removed and older companies get their search tokens
+    first. Each index is created on its own, so one failure does not leave the others missing.
+    """
+    from pymongo.errors import OperationFailure
+    try:
+        removed = collection.delete_many(LEGACY_CHECK_DOCUMENT).deleted_count
+        if removed:
+            logger.info(f"Removed {removed} leftover connection-check documents")
+    except Exception as e:
+        logger.warning(f"Failed to remove connection-check documents: {e}")
+    try:
+        backfill_search_tokens(collection)
+    except Exception as e:
+        logger.warning(f"Failed to backfill search tokens: {e}")
+    for keys, options in COMPANY_INDEXES:
+        try:
+            try:
+                collection.create_index(keys, **options)
+            except OperationFailure as e:
+                # IndexOptionsConflict / IndexKeySpecsConflict: an older definition under the same name
+                if e.code not in (85, 86):
+                    raise
+                logger.info(f"Recreating index {options['name']} with its current definition")
+                collection.drop_index(options['name'])
+                collection.create_index(keys, **options)
+        except Exception as e:
+            logger.warning(f"Failed to ensure company index {options['name']}: {e}")
+
+class CompanyScraper:
+    def __init__(self, mongodb_uri, database_name='company_db', collection_name='scraper_results', skip_mongodb=False,
+                 max_workers=1, host_delay=1.0, cache_dir=None, cache_ttl=86400, cache_max_bytes=500 * 1024 * 1024,
+                 wiki_titles_path='wiki_titles.json', browser_pool_size=2, browser_max_pages=50,
+                 write_batch_size=50, write_flush_interval=5.0, html_parser=None,
+                 known_websites_path=None, websites_cache_path='websites.json',
+                 logo_cache_path='logo_cache.json', logo_hit_ttl=30 * 86400, logo_miss_ttl=86400,
+                 results_spill_path=None, results_window=100, circuit_failures=5, circuit_open_seconds=60.0,
+                 record_archive=None, replay_archive=None, memo_max_bytes=64 * 1024 * 1024):
+        """Initialize the MongoDB client (checked in the background) and scraper settings.
+
+        record_archive is a path every fetched response is appended to; replay_archive is such an
+        archive to serve all requests from instead of the network, with no rate limiting.
+        memo_max_bytes bounds the per-run response memo; 0 turns it off.
+        """
+        if record_archive and replay_archive:
+            raise ValueError("A crawl can record an archive or replay one, not both")
+        if record_archive or replay_archive:
+            # Titles, websites and logos learned by earlier runs would skip requests the archive then
+            # lacks, so recording and replaying both start from the shipped lookups only
+            wiki_titles_path = websites_cache_path = logo_cache_path = None
+        self.skip_mongodb = skip_mongodb
+        self.max_workers = max(1, max_workers)
+        self.html_parser = html_parser or DEFAULT_HTML_PARSER
+        # Store scraped data in memory, or spill it to disk so long runs keep a constant footprint
+        self.results = ResultSpill(results_spill_path, results_window) if results_spill_path else []
+        self.metrics = StageMetrics()
+        self.wiki_titles = WikiTitleStore(wiki_titles_path)
+        self.website_resolver = WebsiteResolver(
+            known_websites_path or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'company_websites.json'),
+            websites_cache_path
+        )
+        self.logo_cache = LogoCache(logo_cache_path, hit_ttl=logo_hit_ttl, miss_ttl=logo_miss_ttl)
+        self._wiki_candidates = {}  # company -> keyword-validated titles awaiting the infobox check
+        self._wiki_next_term = {}  # company -> index of the first search term not tried yet
+        self._wiki_chunks = {}  # company -> the chunk of scrape targets its title is resolved with
+        self._mongodb_checked = threading.Event()
+        self.mongodb_error = None
+        self.collection = None
+        self.write_buffer = None
+        if not skip_mongodb:
+            import certifi
+            import pymongo
+            logger.debug("pymongo version: %s", pymongo.__version__)
+            logger.debug("Attempting MongoDB connection with URI: %s... (truncated for logs)", mongodb_uri[:50])
+            # MongoClient connects lazily and retries server selection itself, so constructing it is cheap
+            self.client = pymongo.MongoClient(
+                mongodb_uri,
+                serverSelectionTimeoutMS=30000,
+                connectTimeoutMS=30000,
+                socketTimeoutMS=30000,
+                heartbeatFrequencyMS=30000,
+                maxPoolSize=5,
+                tls=True,
+                tlsCAFile=certifi.where(),
+                retryWrites=True,
+                w='majority',
+                appName='CompanyScraper'
+            )
+            self.db = self.client[database_name]
+            self.collection = self.db[collection_name]
+            # Company upserts are batched into bulk_write calls instead of one round trip per company
+            self.write_buffer = BulkWriteBuffer(self.collection, batch_size=write_batch_size,
+                                                flush_interval=write_flush_interval, name='companies',
+                                                metrics=self.metrics)
+            # The connection check runs in the background while scraping starts
+            threading.Thread(target=self._check_mongodb, name='mongodb-check', daemon=True).start()
         else:
             logger.info("Skipping MongoDB connection as per configuration")
-            self.collection = None
-
-        self.session = requests.Session()
-        retries = Retry(total=5, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
-        self.session.mount('http://', HTTPAdapter(max_retries=retries))
-        self.session.mount('https://', HTTPAdapter(max_retries=retries))
+            self._mongodb_checked.set()
+
+        # Politeness is enforced per target host, so workers only wait on each other when they hit the same site;
+        # each host's pace then adapts to its responses. Clearbit's logo endpoint is a CDN meant for bulk
+        # lookups, so it starts with a much shorter spacing
+        self.limiter = AdaptiveRateLimiter(host_delay, host_intervals={CLEARBIT_LOGO_HOST: min(host_delay, 0.1)},
+                                           failure_threshold=circuit_failures, open_seconds=circuit_open_seconds)
+        # Optional persistent response cache so incremental runs revalidate instead of re-downloading
+        self.http_cache = HttpCache(cache_dir, ttl=cache_ttl, max_bytes=cache_max_bytes) if cache_dir else None
+        self.archive = CrawlArchive(record_archive) if record_archive else None
+        # Each URL is fetched once per run however many stages or workers ask for it
+        self.memo = RequestMemo(memo_max_bytes) if memo_max_bytes else None
+        self.replaying = bool(replay_archive)
+        if self.replaying:
+            self.session = ReplaySession(ArchiveReader(replay_archive))
+        else:
+            self.session = ScraperSession(self.limiter, cache=self.http_cache, archive=self.archive, memo=self.memo)
+            # 429 and 503 are left to the session's limiter, which honours Retry-After across all workers
+            retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[500, 502, 504])
+            # Size the connection pools so concurrent workers share keep-alive connections instead of discarding them
+            pool_size = max(10, self.max_workers)
+            self.session.mount('http://', HTTPAdapter(max_retries=retries, pool_connections=pool_size, pool_maxsize=pool_size))
+            self.session.mount('https://', HTTPAdapter(max_retries=retries, pool_connections=pool_size, pool_maxsize=pool_size))
         self.session.timeout = 15
         # Check chromedriver once during initialization
         self.chromedriver_path = shutil.which('chromedriver')
-        if not self.chromedriver_path:
+        self.browser_pool = None
+        if self.replaying:
+            logger.info("Replaying responses from %s; the browser pool is not used", replay_archive)
+        elif not self.chromedriver_path:
             logger.warning("Chromedriver not found. Install it via 'sudo apt-get install chromium-chromedriver' or download from https://chromedriver.chromium.org/downloads. Using requests instead.")
+        else:
+            self.browser_pool = ChromeDriverPool(
+                size=browser_pool_size,
+                max_pages=browser_max_pages,
+                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            )
+
+    def _check_mongodb(self):
+        """Verify the MongoDB connection with a read-only ping."""
+        try:
+            start_time = time.time()
+            self.client.admin.command('ping')
+            duration = (time.time() - start_time) * 1000
+            logger.info(f"Connected to MongoDB successfully, ping answered in {duration:.2f}ms")
+            ensure_company_indexes(self.collection)
+        except Exception as e:
+            logger.error(f"MongoDB connection check failed: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
+            self.mongodb_error = e
+        finally:
+            self._mongodb_checked.set()
+
+    def mongodb_available(self):
+        """Wait for the background connection check; on failure fall back to skip_mongodb=True."""
+        if self.skip_mongodb:
+            return False
+        self._mongodb_checked.wait()
+        if self.mongodb_error is not None:
+            if not self.skip_mongodb:
+                logger.warning("MongoDB unavailable. Falling back to skip_mongodb=True")
+                self.skip_mongodb = True
+            return False
+        return True
 
     def close_connection(self):
         """Close MongoDB connection and requests session."""
-        if not self.skip_mongodb and hasattr(self, 'client'):
+        self.wiki_titles.save()
+        self.website_resolver.save()
+        self.logo_cache.save()
+        if self.browser_pool:
+            self.browser_pool.close()
+        if self.write_buffer:
+            self.write_buffer.close()
+        if hasattr(self, 'client'):
             self.client.close()
         self.session.close()
+        if self.archive:
+            self.archive.close()
+        if self.memo and not self.replaying:
+            memo = self.memo.stats()
+            logger.info(f"Request memo: {memo['fetched']} fetched, {memo['saved']} saved "
+                        f"({memo['memo_hits']} repeats, {memo['coalesced']} coalesced)")
+        if self.replaying:
+            logger.info(f"Crawl archive replay: {self.session.hits} responses served, {self.session.misses} requests not archived")
+        if self.http_cache:
+            logger.info(f"HTTP cache: {self.http_cache.hits} fresh hits, {self.http_cache.revalidated} revalidated, {self.http_cache.misses} misses")
+        logger.info(f"Logo cache: {self.logo_cache.hits} hits, {self.logo_cache.misses} misses")
         logger.info("Connections closed")
 
     def clean_text(self, text):
         """Clean scraped text by removing extra whitespace, special characters, and HTML tags."""
-        if text:
-            soup = BeautifulSoup(text, 'html.parser')
-            text = soup.get_text(separator=' ')
-            return re.sub(r'\s+', ' ', text.strip())
-        return None
+        return clean_text(text, self.html_parser)
 
     def extract_domain(self, url):
         """Extract domain from URL."""
@@ -123,387 +1160,122 @@ class CompanyScraper:
             return parsed.netloc or None
         return None
 
-    def scrape_clearbit_logo(self, company_name):
-        """Scrape company logo from Clearbit Logo API."""
+    def scrape_clearbit_logo(self, company_name, domain=None):
+        """Scrape company logo from Clearbit Logo API, using the resolved domain when one is known.
+
+        Results, including misses, are served from the logo cache until their TTL runs out.
+        """
+        start = time.perf_counter()
         try:
-            logger.debug(f"Scraping logo for {company_name} from Clearbit")
-            domain = f"www.{company_name.lower()}.com"
-            logo_url = f"https://logo.clearbit.com/{domain}"
+            domain = domain or self.website_resolver.domain(company_name) or f"www.{company_name.lower()}.com"
+            found, cached_logo = self.logo_cache.lookup(domain)
+            if found:
+                logger.debug("Logo cache hit for %s (%s): %s", company_name, domain, cached_logo)
+                return cached_logo
+            logger.debug("Scraping logo for %s from Clearbit", company_name)
+            logo_url = f"https://{CLEARBIT_LOGO_HOST}/{domain}"
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             }
             response = self.session.head(logo_url, headers=headers, timeout=self.session.timeout)
             if response.status_code == 200:
-                logger.debug(f"Found logo for {company_name} at {logo_url}")
+                logger.debug("Found logo for %s at %s", company_name, logo_url)
+                self.logo_cache.store(domain, logo_url)
                 return logo_url
+            if response.status_code in (404, 410):
+                # Only a definite "no such logo" is remembered; throttling and server errors are retried next time
+                self.logo_cache.store(domain, None)
             logger.warning(f"No logo found on Clearbit for {company_name}")
             return None
         except Exception as e:
-            logger.error(f"Error scraping Clearbit logo for {company_name}: {e}\n{traceback.format_exc()}")
+            logger.error(f"Error scraping Clearbit logo for {company_name}: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
             return None
+        finally:
+            self.metrics.observe('logo', (time.perf_counter() - start) * 1000)
 
-    def scrape_wikipedia_tech_stack(self, soup, company_name):
-        """Scrape programming languages, tools, and frameworks from Wikipedia infobox, article, and specific sections."""
-        tech_stack = []
-        languages = {
-            'python': 'Python',
-            'javascript': 'JavaScript',
-            'java': 'Java',
-            'c++': 'C++',
-            'c#': 'C#',
-            'ruby': 'Ruby',
-            'php': 'PHP',
-            'swift': 'Swift',
-            'kotlin': 'Kotlin',
-            'typescript': 'TypeScript',
-            'go': 'Go',
-            'rust': 'Rust'
-        }
-        tools = {
-            'git': 'Git',
-            'docker': 'Docker',
-            'jenkins': 'Jenkins',
-            'kubernetes': 'Kubernetes',
-            'ansible': 'Ansible',
-            'terraform': 'Terraform',
-            'aws': 'AWS',
-            'azure': 'Azure',
-            'gcp': 'Google Cloud Platform',
-            'cloudflare': 'Cloudflare'
-        }
-        frameworks = {
-            'react': 'React',
-            'angular': 'Angular',
-            'vue': 'Vue.js',
-            'django': 'Django',
-            'flask': 'Flask',
-            'node': 'Node.js',
-            'express': 'Express.js',
-            'wordpress': 'WordPress',
-            'next': 'Next.js',
-            'gatsby': 'Gatsby',
-            'tailwind': 'Tailwind CSS',
-            'laravel': 'Laravel',
-            'svelte': 'Svelte',
-            'nuxt': 'Nuxt.js'
-        }
+    def scrape_wikipedia_tech_stack(self, page, company_name):
+        """Scrape programming languages, tools, and frameworks from Wikipedia infobox, article, and specific sections.
 
-        # Check infobox
-        infobox = soup.find('table', {'class': 'infobox'})
-        if infobox:
-            rows = infobox.find_all('tr')
-            for row in rows:
-                header = row.find('th')
-                if header:
-                    header_text = header.text.lower().strip()
-                    cell = row.find('td')
-                    if cell and ('products' in header_text or 'services' in header_text or 'technology' in header_text):
-                        cell_text = self.clean_text(cell.text)
-                        if cell_text:
-                            cell_text = cell_text.lower()
-                            for key, tech in {**languages, **tools, **frameworks}.items():
-                                if key in cell_text and tech not in tech_stack:
-                                    tech_stack.append(tech)
-                                    logger.debug(f"Detected {tech} in Wikipedia infobox for {company_name}")
-
-        # Check specific sections
-        sections = soup.find_all(['h2', 'h3'])
-        for section in sections:
-            section_title = self.clean_text(section.text)
-            if section_title and any(keyword in section_title.lower() for keyword in ['products', 'services', 'technology', 'operations', 'software', 'hardware', 'research']):
-                content = []
-                for sibling in section.find_next_siblings():
-                    if sibling.name in ['h2', 'h3']:
-                        break
-                    content.append(sibling.get_text())
-                if content:  # Check if content is non-empty
-                    section_text = self.clean_text(' '.join(content))
-                    if section_text:
-                        section_text = section_text.lower()
-                        for key, tech in {**languages, **tools, **frameworks}.items():
-                            if key in section_text and tech not in tech_stack:
-                                tech_stack.append(tech)
-                                logger.debug(f"Detected {tech} in Wikipedia section '{section_title}' for {company_name}")
-
-        # Check all paragraphs
-        paragraphs = soup.find_all('p')
-        for p in paragraphs:
-            text = self.clean_text(p.text)
-            if text:
-                text = text.lower()
-                for key, tech in {**languages, **tools, **frameworks}.items():
-                    if key in text and tech not in tech_stack:
-                        tech_stack.append(tech)
-                        logger.debug(f"Detected {tech} in Wikipedia paragraph for {company_name}")
-
-        logger.debug(f"Extracted tech stack from Wikipedia for {company_name}: {tech_stack}")
-        return tech_stack
-
-    def scrape_website(self, company_name):
+        page is a parsed article or its WikipediaDocument.
+        """
+        return extract_wikipedia_tech_stack(page, company_name, self.html_parser)
+
+    def _fetch_website_content(self, website):
+        """Download a homepage, through the browser pool when available; raises RequestException on failure."""
+        if self.browser_pool:
+            try:
+                logger.debug("Scraping website with Selenium: %s", website)
+                host = urlparse(website).netloc
+                # Wait for the host's slot before leasing, so a paced or open-circuit host never holds a driver
+                self.limiter.wait(host)
+                sent = False
+                try:
+                    with self.browser_pool.lease() as driver, self.metrics.time('page_fetch'):
+                        sent = True
+                        start = time.perf_counter()
+                        try:
+                            driver.get(website)
+                            self.browser_pool.wait_until_ready(driver)
+                            content = driver.page_source
+                        except Exception:
+                            self.limiter.record(host, error=True)
+                            raise
+                        self.limiter.record(host, 200, (time.perf_counter() - start) * 1000)
+                finally:
+                    if not sent:
+                        # No driver could be leased, so the host never saw this request
+                        self.limiter.cancel(host)
+                if content:
+                    if self.archive:
+                        self.archive.record_page(website, content)
+                    return content
+            except Exception as se:
+                # Only this page falls back; the pool replaces a failed driver for later pages
+                logger.warning(f"Selenium failed for {website}: {se}. Falling back to requests.")
+
+        with self.metrics.time('page_fetch'):
+            response = self.session.get(url=website, headers=WEBSITE_HEADERS, timeout=self.session.timeout)
+            response.raise_for_status()
+            return response.text
+
+    def _fetch_website_headers(self, website):
+        """Return the homepage's response headers from a HEAD request, or {} if it fails."""
+        try:
+            return dict(self.session.head(url=website, headers=WEBSITE_HEADERS, timeout=self.session.timeout).headers)
+        except Exception:
+            return {}
+
+    def scrape_website(self, company_name, wiki_website=None):
         """Scrape company website information with enhanced tech stack detection."""
+        website = None
+        domain = None
         try:
-            logger.debug(f"Starting website scrape for {company_name}")
-            known_urls = {
-				'Walmart': 'https://www.walmart.com',
-				'Amazon': 'https://www.amazon.com',
-				'ExxonMobil': 'https://corporate.exxonmobil.com',
-				'Apple': 'https://www.apple.com',
-				'Microsoft': 'https://www.microsoft.com',
-				'JPMorgan Chase': 'https://www.jpmorganchase.com',
-				'Chevron': 'https://www.chevron.com',
-				'UnitedHealth Group': 'https://www.unitedhealthgroup.com',
-				'General Motors': 'https://www.gm.com',
-				'Ford Motor Company': 'https://www.ford.com',
-				'CVS Health': 'https://www.cvshealth.com',
-				'AT&T': 'https://www.att.com',
-				'Berkshire Hathaway': 'https://www.berkshirehathaway.com',
-				'Costco Wholesale': 'https://www.costco.com',
-				'Home Depot': 'https://www.homedepot.com',
-				'Walgreens Boots Alliance': 'https://www.walgreensbootsalliance.com',
-				'Marathon Petroleum': 'https://www.marathonpetroleum.com',
-				'Alphabet': 'https://abc.xyz',
-				'Meta': 'https://about.meta.com',
-				'Verizon Communications': 'https://www.verizon.com',
-				'Comcast': 'https://corporate.comcast.com',
-				'Intel': 'https://www.intel.com',
-				'Pfizer': 'https://www.pfizer.com',
-				'Johnson & Johnson': 'https://www.jnj.com',
-				'Cisco Systems': 'https://www.cisco.com',
-				'Eli Lilly': 'https://www.lilly.com',
-				'Coca-Cola': 'https://www.coca-colacompany.com',
-				'PepsiCo': 'https://www.pepsico.com',
-				'Procter & Gamble': 'https://www.pg.com',
-				'General Electric': 'https://www.ge.com',
-				'Nvidia': 'https://www.nvidia.com',
-				'TSMC': 'https://www.tsmc.com',
-				'Samsung Electronics': 'https://www.samsung.com',
-				'Hon Hai Precision': 'https://www.foxconn.com',
-				'Dell Technologies': 'https://www.dell.com',
-				'Oracle': 'https://www.oracle.com',
-				'Salesforce': 'https://www.salesforce.com',
-				'Adobe': 'https://www.adobe.com',
-				'IBM': 'https://www.ibm.com',
-				'Tencent': 'https://www.tencent.com',
-				'Alibaba': 'https://www.alibabagroup.com',
-				'JD.com': 'https://www.jd.com',
-				'Volkswagen Group': 'https://www.volkswagenag.com',
-				'Shell': 'https://www.shell.com',
-				'BP': 'https://www.bp.com',
-				'TotalEnergies': 'https://www.totalenergies.com',
-				'Nestlé': 'https://www.nestle.com',
-				'Glencore': 'https://www.glencore.com',
-				'Unilever': 'https://www.unilever.com',
-				'Siemens': 'https://www.siemens.com',
-				'Mercedes-Benz Group': 'https://www.mercedes-benz.com',
-				'BMW': 'https://www.bmwgroup.com',
-				'Roche': 'https://www.roche.com',
-				'Novartis': 'https://www.novartis.com',
-				'Allianz': 'https://www.allianz.com',
-				'AXA': 'https://www.axa.com',
-				'HSBC': 'https://www.hsbc.com',
-				'Airbus': 'https://www.airbus.com',
-				'LVMH': 'https://www.lvmh.com',
-				'Deutsche Telekom': 'https://www.telekom.com',
-				'Saudi Aramco': 'https://www.aramco.com',
-				'Toyota Motor': 'https://global.toyota',
-				'Mitsubishi Corporation': 'https://www.mitsubishicorp.com',
-				'Honda Motor': 'https://global.honda',
-				'Sony': 'https://www.sony.com',
-				'Reliance Industries': 'https://www.ril.com',
-				'ICBC': 'https://www.icbc.com.cn',
-				'China Construction Bank': 'https://www.ccb.com',
-				'Agricultural Bank of China': 'https://www.abchina.com',
-				'State Grid': 'https://www.sgcc.com.cn',
-				'Sinopec': 'https://www.sinopecgroup.com',
-				'China National Petroleum': 'https://www.cnpc.com.cn',
-				'Ping An Insurance': 'https://www.pingan.com',
-				'Hyundai Motor': 'https://www.hyundai.com',
-				'SoftBank': 'https://group.softbank',
-				'McDonald’s': 'https://www.mcdonalds.com',
-				'Nike': 'https://www.nike.com',
-				'Disney': 'https://www.thewaltdisneycompany.com',
-				'Tesla': 'https://www.tesla.com',
-				'Boeing': 'https://www.boeing.com',
-				'Lockheed Martin': 'https://www.lockheedmartin.com',
-				'Goldman Sachs': 'https://www.goldmansachs.com',
-				'Morgan Stanley': 'https://www.morganstanley.com',
-				'Citigroup': 'https://www.citigroup.com',
-				'Wells Fargo': 'https://www.wellsfargo.com',
-				'BHP Group': 'https://www.bhp.com',
-				'Rio Tinto': 'https://www.riotinto.com',
-				'AstraZeneca': 'https://www.astrazeneca.com',
-				'GSK': 'https://www.gsk.com',
-				'Sanofi': 'https://www.sanofi.com',
-				'UBS': 'https://www.ubs.com',
-				'Credit Suisse': 'https://www.credit-suisse.com',
-				'Zurich Insurance Group': 'https://www.zurich.com',
-				'Vitol': 'https://www.vitol.com',
-				'Trafigura': 'https://www.trafigura.com',
-				'IKEA': 'https://www.ikea.com',
-				'Lidl': 'https://www.lidl.com',
-				'Aldi': 'https://www.aldi.com',
-				'Koch Industries': 'https://www.kochind.com',
-				'Cargill': 'https://www.cargill.com',
-            }
-            website = known_urls.get(company_name)
+            logger.debug("Starting website scrape for %s", company_name)
+            website = self.website_resolver.resolve(company_name, wiki_website=wiki_website)
             if not website:
                 logger.warning(f"No known website URL for {company_name}")
                 return {'website': None, 'logo': None, 'tech_stack': []}
+            domain = self.extract_domain(website)
 
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
+            try:
+                content = self._fetch_website_content(website)
+            except (requests.exceptions.Timeout, requests.exceptions.RequestException) as e:
+                logger.error(f"Requests failed for {website}: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
+                return {'website': website, 'logo': self.scrape_clearbit_logo(company_name, domain), 'tech_stack': []}
 
-            content = None
-            if self.chromedriver_path:
-                try:
-                    logger.debug(f"Scraping website with Selenium: {website}")
-                    options = Options()
-                    options.add_argument('--headless')
-                    options.add_argument('--disable-gpu')
-                    options.add_argument(f'user-agent={headers["User-Agent"]}')
-                    driver = webdriver.Chrome(options=options)
-                    driver.set_page_load_timeout(30)
-                    driver.get(website)
-                    time.sleep(3)  # Wait for dynamic content
-                    content = driver.page_source
-                    driver.quit()
-                except selenium.common.exceptions.WebDriverException as se:
-                    logger.warning(f"Selenium failed for {website}: {se}. Falling back to requests.")
-                    self.chromedriver_path = None  # Avoid retrying Selenium
-
-            if not content:
-                try:
-                    response = self.session.get(url=website, headers=headers, timeout=self.session.timeout)
-                    response.raise_for_status()
-                    content = response.text
-                except (requests.exceptions.Timeout, requests.exceptions.RequestException) as e:
-                    logger.error(f"Requests failed for {website}: {e}\n{traceback.format_exc()}")
-                    return {'website': website, 'logo': self.scrape_clearbit_logo(company_name), 'tech_stack': []}
-
-            soup = BeautifulSoup(content, 'html.parser')
-
-            # Enhanced logo detection
-            logo = None
-            img_tags = soup.find_all('img')
-            for img in img_tags:
-                alt_text = img.get('alt', '').lower()
-                src_text = img.get('src', '').lower()
-                class_text = ' '.join(img.get('class', [])).lower()
-                if 'logo' in alt_text or 'logo' in src_text or 'logo' in class_text or company_name.lower() in alt_text:
-                    logo = img.get('src')
-                    if logo and not logo.startswith('http'):
-                        logo = f"{website.rstrip('/')}/{logo.lstrip('/')}"
-                    break
+            with self.metrics.time('parse'):
+                soup = BeautifulSoup(content, self.html_parser, parse_only=WEBSITE_PARSE_ONLY)
 
-            # Fallback to Clearbit
+            # Enhanced logo detection, falling back to Clearbit
+            logo = find_website_logo(soup, company_name, website)
             if not logo:
-                logo = self.scrape_clearbit_logo(company_name)
+                logo = self.scrape_clearbit_logo(company_name, domain)
 
-            # Enhanced tech stack detection
-            tech_stack = []
-            frameworks = {
-                'react': 'React',
-                'angular': 'Angular',
-                'vue': 'Vue.js',
-                'jquery': 'jQuery',
-                'bootstrap': 'Bootstrap',
-                'node': 'Node.js',
-                'express': 'Express.js',
-                'django': 'Django',
-                'flask': 'Flask',
-                'wordpress': 'WordPress',
-                'next': 'Next.js',
-                'gatsby': 'Gatsby',
-                'tailwind': 'Tailwind CSS',
-                'laravel': 'Laravel',
-                'svelte': 'Svelte',
-                'nuxt': 'Nuxt.js'
-            }
-            languages = {
-                'javascript': 'JavaScript',
-                'python': 'Python',
-                'java': 'Java',
-                'c++': 'C++',
-                'c#': 'C#',
-                'ruby': 'Ruby',
-                'php': 'PHP',
-                'swift': 'Swift',
-                'kotlin': 'Kotlin',
-                'typescript': 'TypeScript',
-                'go': 'Go',
-                'rust': 'Rust'
-            }
-            tools = {
-                'git': 'Git',
-                'docker': 'Docker',
-                'jenkins': 'Jenkins',
-                'kubernetes': 'Kubernetes',
-                'ansible': 'Ansible',
-                'terraform': 'Terraform',
-                'aws': 'AWS',
-                'azure': 'Azure',
-                'gcp': 'Google Cloud Platform',
-                'cloudflare': 'Cloudflare'
-            }
+            with self.metrics.time('tech_detection'):
+                tech_stack = detect_website_tech(soup, company_name)
+            detect_header_tech(tech_stack, self._fetch_website_headers(website), company_name)
 
-            # Check scripts
-            scripts = soup.find_all('script')
-            for script in scripts:
-                src = script.get('src', '').lower()
-                content = script.text.lower()
-                for key, tech in {**frameworks, **languages, **tools}.items():
-                    if (key in src or key in content) and tech not in tech_stack:
-                        tech_stack.append(tech)
-                        logger.debug(f"Detected {tech} in website script for {company_name}")
-                if src and '.js' in src and 'JavaScript' not in tech_stack:
-                    tech_stack.append('JavaScript')
-                    logger.debug(f"Detected JavaScript in website script for {company_name}")
-                if src and '.py' in src and 'Python' not in tech_stack:
-                    tech_stack.append('Python')
-                    logger.debug(f"Detected Python in website script for {company_name}")
-
-            # Check link tags for CSS frameworks
-            links = soup.find_all('link', {'rel': 'stylesheet'})
-            for link in links:
-                href = link.get('href', '').lower()
-                for key, tech in frameworks.items():
-                    if key in href and tech not in tech_stack:
-                        tech_stack.append(tech)
-                        logger.debug(f"Detected {tech} in website link tag for {company_name}")
-                if 'tailwind' in href and 'Tailwind CSS' not in tech_stack:
-                    tech_stack.append('Tailwind CSS')
-                    logger.debug(f"Detected Tailwind CSS in website link tag for {company_name}")
-                if 'bootstrap' in href and 'Bootstrap' not in tech_stack:
-                    tech_stack.append('Bootstrap')
-                    logger.debug(f"Detected Bootstrap in website link tag for {company_name}")
-
-            # Check meta tags
-            meta_tags = soup.find_all('meta')
-            for meta in meta_tags:
-                content = meta.get('content', '').lower()
-                for key, tech in {**frameworks, **languages, **tools}.items():
-                    if key in content and tech not in tech_stack:
-                        tech_stack.append(tech)
-                        logger.debug(f"Detected {tech} in website meta tag for {company_name}")
-
-            # Check headers
-            try:
-                response = self.session.head(url=website, headers=headers, timeout=self.session.timeout)
-                headers_lower = {k.lower(): v.lower() for k, v in response.headers.items()}
-                if 'x-powered-by' in headers_lower:
-                    powered_by = headers_lower['x-powered-by']
-                    for key, tech in {**frameworks, **languages, **tools}.items():
-                        if key in powered_by and tech not in tech_stack:
-                            tech_stack.append(tech)
-                            logger.debug(f"Detected {tech} in website headers for {company_name}")
-                if 'server' in headers_lower and 'cloudflare' in headers_lower['server']:
-                    tech_stack.append('Cloudflare')
-                    logger.debug(f"Detected Cloudflare in website headers for {company_name}")
-            except:
-                pass
-
-            logger.debug(f"Website scrape completed for {company_name}: tech_stack={tech_stack}")
+            logger.debug("Website scrape completed for %s: tech_stack=%s", company_name, tech_stack)
             return {
                 'website': website,
                 'logo': logo,
@@ -511,187 +1283,272 @@ class CompanyScraper:
             }
 
         except Exception as e:
-            logger.error(f"Unexpected error scraping website for {company_name}: {website}: {e}\n{traceback.format_exc()}")
-            return {'website': website, 'logo': self.scrape_clearbit_logo(company_name), 'tech_stack': []}
-
-    def scrape_wikipedia(self, company_name):
-        """Scrape Wikipedia using MediaWiki API with improved title search and full page scraping."""
-        try:
-            logger.debug(f"Starting Wikipedia scrape for {company_name}")
-            start_time = time.time()
-            search_url = "https://en.wikipedia.org/w/api.php"
-            headers = {'User-Agent': 'CompanyScraper/1.0 (pranay@example.com)'}
-
-            # Try multiple search terms
-            search_terms = [
-                f"{company_name}, Inc.",
-                f"{company_name} (company)",
-                f"{company_name}",
-                f"{company_name} company"
-            ]
-            title = None
-            for term in search_terms:
-                logger.debug(f"Searching Wikipedia with term: {term}")
-                search_params = {
-                    'action': 'opensearch',
-                    'search': term,
-                    'limit': 1,
-                    'format': 'json'
-                }
-                response = self.session.get(search_url, params=search_params, headers=headers, timeout=self.session.timeout)
-                response.raise_for_status()
-                search_data = response.json()
-
-                if search_data[1]:
-                    title = search_data[1][0]
-                    logger.debug(f"Found potential title: {title}")
-                    # Validate title
-                    query_params = {
-                        'action': 'query',
-                        'titles': title,
-                        'format': 'json',
-                        'prop': 'extracts|info',
-                        'exintro': 1,
-                        'exsentences': 2,
-                        'inprop': 'url'
-                    }
-                    response = self.session.get(search_url, params=query_params, headers=headers, timeout=self.session.timeout)
-                    response.raise_for_status()
-                    data = response.json()
-                    page = next(iter(data['query']['pages'].values()))
-                    if 'extract' in page and page['extract']:
-                        summary = self.clean_text(page['extract']).lower()
-                        # Check for company-specific keywords and infobox
-                        page_url = page.get('fullurl', f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}")
-                        page_response = self.session.get(page_url, headers=headers, timeout=self.session.timeout)
-                        page_response.raise_for_status()
-                        page_soup = BeautifulSoup(page_response.text, 'html.parser')
-                        infobox = page_soup.find('table', {'class': 'infobox'})
-                        if infobox and any(keyword in summary for keyword in ['corporation', 'multinational', 'company', 'founded', 'headquarters']):
-                            logger.debug(f"Validated title: {title}")
-                            break
-                    logger.debug(f"Title {title} invalid or missing extract for term '{term}', trying next term")
-                    title = None
-
-            if not title:
-                logger.warning(f"No valid Wikipedia page found for {company_name}")
+            logger.error(f"Unexpected error scraping website for {company_name}: {website}: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
+            return {'website': website, 'logo': self.scrape_clearbit_logo(company_name, domain), 'tech_stack': []}
+
+    def _wiki_api(self, params):
+        """Issue a MediaWiki API request and return the decoded JSON."""
+        response = self.session.get(WIKIPEDIA_API_URL, params=params, headers=WIKIPEDIA_HEADERS, timeout=self.session.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _search_wikipedia(self, term):
+        """Return the top opensearch title for term, or None."""
+        logger.debug("Searching Wikipedia with term: %s", term)
+        with self.metrics.time('search'):
+            search_data = self._wiki_api({
+                'action': 'opensearch',
+                'search': term,
+                'limit': 1,
+                'format': 'json'
+            })
+        return search_data[1][0] if search_data[1] else None
+
+    def _fetch_wikipedia_summaries(self, titles):
+        """Fetch intro extracts for many titles in batched query calls; returns title -> page."""
+        pages_by_title = {}
+        titles = list(dict.fromkeys(titles))
+        for i in range(0, len(titles), WIKIPEDIA_BATCH_SIZE):
+            batch = titles[i:i + WIKIPEDIA_BATCH_SIZE]
+            with self.metrics.time('validate'):
+                data = self._wiki_api({
+                    'action': 'query',
+                    'titles': '|'.join(batch),
+                    'format': 'json',
+                    'prop': 'extracts|info',
+                    'exintro': 1,
+                    'exsentences': 2,
+                    'exlimit': 'max',
+                    'inprop': 'url'
+                })
+            query = data.get('query', {})
+            pages = {page.get('title'): page for page in query.get('pages', {}).values()}
+            normalized = {item['from']: item['to'] for item in query.get('normalized', [])}
+            for title in batch:
+                page = pages.get(normalized.get(title, title))
+                if page is not None:
+                    pages_by_title[title] = page
+        return pages_by_title
+
+    def resolve_wikipedia_titles(self, companies, max_workers=None):
+        """Resolve candidate Wikipedia titles for many companies, batching the validation queries.
+
+        Companies with a persisted title are skipped. The others go through the search terms in
+        rounds: every unresolved company runs one opensearch, on up to max_workers threads, then
+        all found titles are validated together. A company stops at the first term whose title's
+        summary looks like a company; the infobox check happens in _find_wikipedia_article on the
+        page it downloads anyway, and if it fails, calling this again resumes at the next term.
+        """
+        pending = [c for c in dict.fromkeys(companies) if c and not self.wiki_titles.get(c) and c not in self._wiki_candidates]
+        if not pending:
+            return
+        logger.info(f"Resolving Wikipedia titles for {len(pending)} companies")
+        start_time = time.time()
+        term_count = len(wikipedia_search_terms(''))
+        found = {company: [] for company in pending}
+        next_term = {company: self._wiki_next_term.pop(company, 0) for company in pending}
+
+        def search(company, term_index):
+            try:
+                return self._search_wikipedia(wikipedia_search_terms(company)[term_index])
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Wikipedia search failed for {company}: {e}")
                 return None
 
-            # Fetch full page data
-            query_params = {
-                'action': 'query',
-                'titles': title,
-                'format': 'json',
-                'redirects': 1,
-                'prop': 'extracts|info',
-                'exlimit': 'max',
-                'inprop': 'url'
-            }
-            logger.debug(f"Fetching full Wikipedia page data for {title}")
-            response = self.session.get(search_url, params=query_params, headers=headers, timeout=self.session.timeout)
+        workers = min(max(1, max_workers or self.max_workers), len(pending))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='wiki-search') as executor:
+            while True:
+                unresolved = [c for c in pending if not found[c] and next_term[c] < term_count]
+                if not unresolved:
+                    break
+                titles = executor.map(search, unresolved, [next_term[c] for c in unresolved])
+                for company in unresolved:
+                    next_term[company] += 1
+                candidates = {company: title for company, title in zip(unresolved, titles) if title}
+                try:
+                    pages = self._fetch_wikipedia_summaries(candidates.values())
+                except requests.exceptions.RequestException as e:
+                    logger.warning(f"Batched Wikipedia validation failed: {e}")
+                    continue
+                for company, title in candidates.items():
+                    page = pages.get(title)
+                    if page and page.get('extract'):
+                        summary = (self.clean_text(page['extract']) or '').lower()
+                        if any(keyword in summary for keyword in WIKIPEDIA_COMPANY_KEYWORDS):
+                            logger.debug("Found potential title for %s: %s", company, title)
+                            found[company].append(page.get('title', title))
+                            continue
+                    logger.debug("Title %s invalid or missing extract for %s, trying next term", title, company)
+        for company, titles in found.items():
+            self._wiki_candidates[company] = titles
+            if next_term[company] < term_count:
+                self._wiki_next_term[company] = next_term[company]
+        logger.info(f"Resolved Wikipedia candidates for {sum(1 for t in found.values() if t)}/{len(pending)} companies in {(time.time() - start_time)*1000:.2f}ms")
+
+    def _plan_wikipedia_chunks(self, targets, max_workers):
+        """Group targets so each group's titles are resolved together when the first of them is scraped.
+
+        Resolving alongside scraping, instead of for the whole list up front, means an interrupted
+        run loses at most the searches of the chunks in flight.
+        """
+        self._wiki_chunks = {}
+        for i in range(0, len(targets), WIKIPEDIA_BATCH_SIZE):
+            chunk = {'companies': targets[i:i + WIKIPEDIA_BATCH_SIZE], 'max_workers': max_workers,
+                     'lock': threading.Lock(), 'resolved': False}
+            for company in chunk['companies']:
+                self._wiki_chunks[company] = chunk
+
+    def _resolve_wikipedia_chunk(self, company_name):
+        chunk = self._wiki_chunks.get(company_name)
+        if chunk is None:
+            return
+        with chunk['lock']:
+            if chunk['resolved']:
+                return
+            chunk['resolved'] = True
+            try:
+                self.resolve_wikipedia_titles(chunk['companies'], chunk['max_workers'])
+            except Exception as e:
+                logger.warning(f"Batched Wikipedia resolution failed, companies will resolve individually: {e}")
+
+    def _download_wikipedia_page(self, title):
+        """Download an article's HTML."""
+        page_url = f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"
+        with self.metrics.time('page_fetch'):
+            response = self.session.get(page_url, headers=WIKIPEDIA_HEADERS, timeout=self.session.timeout)
             response.raise_for_status()
-            data = response.json()
+        return response.text
+
+    def _fetch_wikipedia_page(self, title):
+        """Download and parse an article's HTML."""
+        page_html = self._download_wikipedia_page(title)
+        with self.metrics.time('parse'):
+            return BeautifulSoup(page_html, self.html_parser, parse_only=WIKIPEDIA_PARSE_ONLY)
+
+    def _find_wikipedia_article(self, company_name, parse=True):
+        """Find and download the company's article; returns (title, page, document) or None.
+
+        page is the MediaWiki query result with the summary extract. document is the parsed
+        article, or its raw HTML with parse=False, in which case the infobox check is done on the
+        HTML so the article can be parsed elsewhere. Network errors are raised to the caller.
+        """
+        start_time = time.time()
+        # A persisted title skips the search phase entirely; otherwise walk the resolved candidates
+        # and keep the first one whose page has an infobox, reusing that page for extraction
+        title = None
+        document = None
+        stored_title = self.wiki_titles.get(company_name)
+        if stored_title:
+            candidates = [stored_title]
+        else:
+            self._resolve_wikipedia_chunk(company_name)
+            self.resolve_wikipedia_titles([company_name])
+            candidates = self._wiki_candidates.pop(company_name, [])
+        tried = set()
+        while candidates:
+            for candidate in candidates:
+                if candidate in tried:
+                    continue
+                tried.add(candidate)
+                if parse:
+                    page_document = self._fetch_wikipedia_page(candidate)
+                    valid = page_document.find('table', {'class': 'infobox'}) is not None
+                else:
+                    page_document = self._download_wikipedia_page(candidate)
+                    valid = has_infobox(page_document)
+                if valid:
+                    logger.debug("Validated title: %s", candidate)
+                    title, document = candidate, page_document
+                    break
+                logger.debug("Title %s has no infobox, trying next candidate", candidate)
+            if title or stored_title or company_name not in self._wiki_next_term:
+                break
+            # Every title found so far lacks an infobox; carry on with the remaining search terms
+            self.resolve_wikipedia_titles([company_name])
+            candidates = self._wiki_candidates.pop(company_name, [])
+        self._wiki_next_term.pop(company_name, None)
+
+        if not title:
+            if stored_title:
+                logger.info(f"Stored Wikipedia title {stored_title} for {company_name} no longer validates, re-resolving")
+                self.wiki_titles.discard(company_name)
+                return self._find_wikipedia_article(company_name, parse)
+            logger.warning(f"No valid Wikipedia page found for {company_name}")
+            return None
 
-            pages = data['query']['pages']
-            page = next(iter(pages.values()))
-            if 'missing' in page:
-                logger.warning(f"Wikipedia page {title} is missing")
-                return None
+        # Fetch full page data
+        query_params = {
+            'action': 'query',
+            'titles': title,
+            'format': 'json',
+            'redirects': 1,
+            'prop': 'extracts|info',
+            'exlimit': 'max',
+            'inprop': 'url'
+        }
+        logger.debug("Fetching full Wikipedia page data for %s", title)
+        with self.metrics.time('page_fetch'):
+            data = self._wiki_api(query_params)
+
+        pages = data['query']['pages']
+        page = next(iter(pages.values()))
+        if 'missing' in page:
+            logger.warning(f"Wikipedia page {title} is missing")
+            self.wiki_titles.discard(company_name)
+            return None
+        self.wiki_titles.set(company_name, title)
 
-            logger.debug(f"Retrieved Wikipedia page: {title} in {(time.time() - start_time)*1000:.2f}ms")
+        logger.debug("Retrieved Wikipedia page: %s in %.2fms", title, (time.time() - start_time)*1000)
+        return title, page, document
 
-            summary = None
-            if 'extract' in page and page['extract']:
-                summary = self.clean_text(page['extract'])
-            else:
-                logger.warning(f"No summary available for {title}")
+    def _wikipedia_summary(self, page, title):
+        if 'extract' in page and page['extract']:
+            return self.clean_text(page['extract'])
+        logger.warning(f"No summary available for {title}")
+        return None
 
-            page_url = page.get('fullurl', f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}")
-            response = self.session.get(page_url, headers=headers, timeout=self.session.timeout)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            employees = None
-            revenue = None
-            industries = None
-            infobox = soup.find('table', {'class': 'infobox'})
-            if infobox:
-                rows = infobox.find_all('tr')
-                for row in rows:
-                    header = row.find('th')
-                    if header:
-                        header_text = header.text.lower().strip()
-                        cell = row.find('td')
-                        if cell:
-                            cell_text = self.clean_text(cell.text)
-                            if 'employees' in header_text:
-                                employees = cell_text
-                                logger.debug(f"Found employees for {company_name}: {employees}")
-                            elif 'revenue' in header_text:
-                                revenue = cell_text
-                                logger.debug(f"Found revenue for {company_name}: {revenue}")
-                            elif 'industry' in header_text or 'industries' in header_text:
-                                industries = cell_text
-                                logger.debug(f"Found industries for {company_name}: {industries}")
-
-            # Fallback: Scrape sections if infobox is missing or incomplete
-            if not all([employees, revenue, industries]):
-                sections = soup.find_all(['h2', 'h3'])
-                for section in sections:
-                    section_title = self.clean_text(section.text)
-                    if section_title and any(keyword in section_title.lower() for keyword in ['operations', 'history', 'financials', 'business', 'about']):
-                        content = []
-                        for sibling in section.find_next_siblings():
-                            if sibling.name in ['h2', 'h3']:
-                                break
-                            content.append(sibling.get_text())
-                        if content:  # Check if content is non-empty
-                            section_text = self.clean_text(' '.join(content))
-                            if section_text:
-                                section_text = section_text.lower()
-                                if not employees and 'employees' in section_text:
-                                    match = re.search(r'(\d{1,3}(?:,\d{3})*(?:\s*\(\d{4}\))?) employees', section_text, re.IGNORECASE)
-                                    if match:
-                                        employees = match.group(1)
-                                        logger.debug(f"Found employees in section for {company_name}: {employees}")
-                                if not revenue and 'revenue' in section_text:
-                                    match = re.search(r'revenue.*?(?:us\$|USD)\s*([\d.]+)\s*(billion|million)', section_text, re.IGNORECASE)
-                                    if match:
-                                        revenue = f"US${match.group(1)} {match.group(2)}"
-                                        logger.debug(f"Found revenue in section for {company_name}: {revenue}")
-                                if not industries and 'industry' in section_text:
-                                    match = re.search(r'industr(?:y|ies):?\s*([a-zA-Z\s,]+)', section_text, re.IGNORECASE)
-                                    if match:
-                                        industries = match.group(1).strip()
-                                        logger.debug(f"Found industries in section for {company_name}: {industries}")
+    def _warn_missing_wikipedia_fields(self, company_name, wiki_data):
+        for field in ('employees', 'revenue', 'industries'):
+            if not wiki_data.get(field):
+                logger.warning(f"No {field} data found for {company_name}")
+        if not wiki_data.get('tech_stack'):
+            logger.warning(f"No tech stack data found for {company_name}")
+
+    def scrape_wikipedia(self, company_name):
+        """Scrape Wikipedia using MediaWiki API with improved title search and full page scraping."""
+        title = None
+        try:
+            logger.debug("Starting Wikipedia scrape for %s", company_name)
+            start_time = time.time()
+            article = self._find_wikipedia_article(company_name)
+            if not article:
+                return None
+            title, page, soup = article
+            summary = self._wikipedia_summary(page, title)
+
+            # The article is indexed once and both extractors read the index
+            with self.metrics.time('parse'):
+                document = WikipediaDocument(soup, self.html_parser)
+                fields = extract_wikipedia_fields(document, company_name, self.html_parser)
 
             # Scrape tech stack, handle errors gracefully
             tech_stack = []
             try:
-                tech_stack = self.scrape_wikipedia_tech_stack(soup, company_name)
+                with self.metrics.time('tech_detection'):
+                    tech_stack = self.scrape_wikipedia_tech_stack(document, company_name)
             except Exception as e:
-                logger.error(f"Error scraping Wikipedia tech stack for {company_name}: {e}\n{traceback.format_exc()}")
+                logger.error(f"Error scraping Wikipedia tech stack for {company_name}: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
                 logger.warning(f"Skipping tech stack for {company_name}, returning other Wikipedia data")
 
-            # Log warnings for missing fields
-            if not employees:
-                logger.warning(f"No employees data found for {company_name}")
-            if not revenue:
-                logger.warning(f"No revenue data found for {company_name}")
-            if not industries:
-                logger.warning(f"No industries data found for {company_name}")
-            if not tech_stack:
-                logger.warning(f"No tech stack data found for {company_name}")
-
-            logger.debug(f"Wikipedia scrape completed for {company_name} in {(time.time() - start_time)*1000:.2f}ms")
-            return {
+            wiki_data = {
                 'description': summary,
-                'employees': employees,
-                'revenue': revenue,
-                'industries': industries,
+                **fields,
                 'wiki_title': title,
                 'tech_stack': tech_stack
             }
+            self._warn_missing_wikipedia_fields(company_name, wiki_data)
+            logger.debug("Wikipedia scrape completed for %s in %.2fms", company_name, (time.time() - start_time)*1000)
+            return wiki_data
 
         except requests.exceptions.Timeout:
             logger.warning(f"Timeout scraping Wikipedia for {company_name}")
@@ -700,7 +1557,7 @@ class CompanyScraper:
             logger.warning(f"Network error scraping Wikipedia for {company_name}: {e}")
             return None
         except Exception as e:
-            logger.error(f"Unexpected error scraping Wikipedia for {company_name}: {e}\n{traceback.format_exc()}")
+            logger.error(f"Unexpected error scraping Wikipedia for {company_name}: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
             return {'wiki_title': title} if title else None
 
     def scrape_company(self, company_name):
@@ -711,116 +1568,553 @@ class CompanyScraper:
                 return None
 
             logger.info(f"Starting to scrape data for {company_name}")
+            company_start = time.perf_counter()
             wiki_data = self.scrape_wikipedia(company_name)
-            time.sleep(3)
-            web_data = self.scrape_website(company_name)
-
-            # Combine tech stacks from Wikipedia and website
-            tech_stack = web_data.get('tech_stack', [])
-            if wiki_data and wiki_data.get('tech_stack'):
-                tech_stack = list(set(tech_stack + wiki_data.get('tech_stack', [])))
-
-            # Ensure Wikipedia data is stored even if website scrape fails
-            company_record = {
-                'name': company_name,
-                'description': wiki_data.get('description') if wiki_data else None,
-                'employees': wiki_data.get('employees') if wiki_data else None,
-                'revenue': wiki_data.get('revenue') if wiki_data else None,
-                'industries': wiki_data.get('industries') if wiki_data else None,
-                'wiki_title': wiki_data.get('wiki_title') if wiki_data else None,
-                'website': web_data.get('website') if web_data else None,
-                'domain': self.extract_domain(web_data.get('website')) if web_data else None,
-                'logo': web_data.get('logo') if web_data else self.scrape_clearbit_logo(company_name),
-                'tech_stack': tech_stack,
-                'scraped_at': datetime.now(UTC),
-                'source': ['Wikipedia'] if wiki_data else []
-            }
-            if web_data and web_data.get('website'):
-                company_record['source'].append('Company Website')
-
-            self.results.append(company_record)
-
-            if not self.skip_mongodb:
-                start_time = time.time()
-                self.collection.update_one(
-                    {'name': company_name},
-                    {'$set': company_record},
-                    upsert=True
-                )
-                duration = (time.time() - start_time) * 1000
-                logger.info(f"Successfully stored data for {company_name} in MongoDB in {duration:.2f}ms")
-            else:
-                logger.info(f"Skipping MongoDB storage for {company_name} (skip_mongodb=True)")
-
+            web_data = self.scrape_website(company_name, wiki_website=wiki_data.get('website') if wiki_data else None)
+            company_record = self._store_company(company_name, wiki_data, web_data)
+            self.metrics.observe('company', (time.perf_counter() - company_start) * 1000)
             return company_record
 
         except Exception as e:
-            logger.error(f"Error scraping company {company_name}: {e}\n{traceback.format_exc()}")
+            logger.error(f"Error scraping company {company_name}: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
             return None
 
-    def export_to_files(self, output_dir='output'):
-        """Export scraped data to Excel and CSV files."""
+    def _store_company(self, company_name, wiki_data, web_data):
+        """Combine Wikipedia and website data into the company record and store it in memory/MongoDB."""
+        # Combine tech stacks from Wikipedia and website
+        tech_stack = web_data.get('tech_stack', [])
+        if wiki_data and wiki_data.get('tech_stack'):
+            tech_stack = list(set(tech_stack + wiki_data.get('tech_stack', [])))
+
+        # Ensure Wikipedia data is stored even if website scrape fails
+        company_record = {
+            'name': company_name,
+            'description': wiki_data.get('description') if wiki_data else None,
+            'employees': wiki_data.get('employees') if wiki_data else None,
+            'revenue': wiki_data.get('revenue') if wiki_data else None,
+            'industries': wiki_data.get('industries') if wiki_data else None,
+            'employee_count': wiki_data.get('employee_count') if wiki_data else None,
+            'revenue_usd': wiki_data.get('revenue_usd') if wiki_data else None,
+            'revenue_year': wiki_data.get('revenue_year') if wiki_data else None,
+            'industry_list': wiki_data.get('industry_list', []) if wiki_data else [],
+            'wiki_title': wiki_data.get('wiki_title') if wiki_data else None,
+            'website': web_data.get('website') if web_data else None,
+            'domain': self.extract_domain(web_data.get('website')) if web_data else None,
+            'logo': web_data.get('logo') if web_data else self.scrape_clearbit_logo(company_name),
+            'tech_stack': tech_stack,
+            'search_tokens': search_tokens(company_name),
+            'scraped_at': datetime.now(UTC),
+            'source': ['Wikipedia'] if wiki_data else []
+        }
+        if web_data and web_data.get('website'):
+            company_record['source'].append('Company Website')
+
+        self.results.append(company_record)
+
+        if self.mongodb_available():
+            from pymongo import UpdateOne
+            self.write_buffer.add(UpdateOne(
+                {'name': company_name},
+                {'$set': company_record},
+                upsert=True,
+                collation=NAME_COLLATION
+            ))
+            logger.info(f"Queued data for {company_name} for MongoDB bulk write")
+        else:
+            logger.info(f"Skipping MongoDB storage for {company_name} (skip_mongodb=True)")
+        return company_record
+
+    def fetch_company_pages(self, company_name):
+        """Fetch stage of the parse pipeline: download a company's pages without parsing them.
+
+        Returns the payload for parse_company_pages plus the Wikipedia title and summary, which
+        stay in this process.
+        """
+        payload = {'company': company_name, 'parser': self.html_parser, 'started': time.perf_counter()}
+        wiki = None
+        try:
+            article = self._find_wikipedia_article(company_name, parse=False)
+            if article:
+                title, page, payload['wiki_html'] = article
+                wiki = {'wiki_title': title, 'description': self._wikipedia_summary(page, title)}
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Network error scraping Wikipedia for {company_name}: {e}")
+        payload['wiki'] = wiki
+
+        website = self.website_resolver.resolve(company_name, wiki_website=infobox_website(payload.get('wiki_html')))
+        payload['website'] = website
+        if not website:
+            logger.warning(f"No known website URL for {company_name}")
+            return payload
+        try:
+            payload['website_html'] = self._fetch_website_content(website)
+            payload['website_headers'] = self._fetch_website_headers(website)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Requests failed for {website}: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
+        return payload
+
+    def _finish_parsed_company(self, payload, parsed):
+        """Store stage of the parse pipeline: merge parsed fields, fill in the logo and store the record."""
+        company_name = payload['company']
+        for stage, duration_ms in parsed['timings']:
+            self.metrics.observe(stage, duration_ms)
+        wiki_data = None
+        if payload['wiki']:
+            wiki_data = {**payload['wiki'], **(parsed['wiki'] or {})}
+            self._warn_missing_wikipedia_fields(company_name, wiki_data)
+        website = payload['website']
+        web_data = {'website': website, 'logo': None, 'tech_stack': []}
+        if parsed['website']:
+            web_data.update(parsed['website'])
+        if website and not web_data['logo']:
+            web_data['logo'] = payload['logo'] if 'logo' in payload else self.scrape_clearbit_logo(company_name, self.extract_domain(website))
+        company_record = self._store_company(company_name, wiki_data, web_data)
+        self.metrics.observe('company', (time.perf_counter() - payload['started']) * 1000)
+        return company_record
+
+    def _iter_threaded(self, targets, max_workers):
+        """Yield (company, record) as a thread pool scrapes each company end to end.
+
+        Only a few companies per worker are submitted ahead, so finished futures and their records
+        are released as the run goes instead of piling up for the whole target list.
+        """
+        pending_targets = iter(targets)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scraper') as executor:
+            futures = {}
+            for company in itertools.islice(pending_targets, max_workers * 4):
+                futures[executor.submit(self.scrape_company, company)] = company
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    company = futures.pop(future)
+                    for next_company in itertools.islice(pending_targets, 1):
+                        futures[executor.submit(self.scrape_company, next_company)] = next_company
+                    try:
+                        yield company, future.result()
+                    except Exception as e:
+                        logger.error(f"Worker failed for {company}: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
+                        yield company, None
+
+    def _iter_pipelined(self, targets, fetch_workers, parse_workers, queue_size):
+        """Yield (company, record) from a fetch -> parse -> store pipeline.
+
+        Fetch threads put raw pages on a bounded queue and block while it is full, so at most
+        queue_size fetched companies plus one batch per parse worker are held in memory. A
+        dispatcher thread hands them to a process pool that runs parse_company_pages, and this
+        generator stores the parsed records as they come back. Homepages whose scan found no logo
+        get their Clearbit check on a thread pool first, so those requests overlap instead of
+        running one at a time in the store stage.
+        """
+        context = multiprocessing.get_context('spawn')
+        log_queue = context.Queue()
+        log_listener = QueueListener(log_queue, *logging.getLogger().handlers, respect_handler_level=True)
+        log_listener.start()
+        fetched = queue.Queue(maxsize=max(1, queue_size))
+        parsed = queue.Queue()
+        parse_slots = threading.BoundedSemaphore(parse_workers * 2)
+
+        def fetch(company):
+            try:
+                payload = self.fetch_company_pages(company)
+            except Exception as e:
+                logger.error(f"Fetch failed for {company}: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
+                payload = {'company': company, 'failed': True}
+            fetched.put(payload)
+
+        def dispatch(parse_pool):
+            pool_error = None
+            for _ in range(len(targets)):
+                payload = fetched.get()
+                if payload.get('failed') or pool_error:
+                    parsed.put((payload['company'], None, None))
+                    continue
+                parse_slots.acquire()
+                work = {k: payload.get(k) for k in ('company', 'parser', 'website', 'wiki_html', 'website_html', 'website_headers')}
+                # The raw HTML now belongs to the parse worker
+                payload.pop('wiki_html', None)
+                payload.pop('website_html', None)
+
+                def done(future, payload=payload):
+                    parse_slots.release()
+                    if payload['website'] and needs_logo(future):
+                        logo_pool.submit(check_logo, payload, future)
+                    else:
+                        parsed.put((payload['company'], payload, future))
+                try:
+                    parse_pool.submit(parse_company_pages, work).add_done_callback(done)
+                except Exception as e:
+                    # A parse worker that died (e.g. killed for memory) breaks the whole pool; the rest
+                    # of the run is still drained so the fetch threads and this generator never block
+                    pool_error = e
+                    parse_slots.release()
+                    logger.error(f"Parse pool failed at {payload['company']}, remaining companies will not be parsed: {e}")
+                    parsed.put((payload['company'], None, None))
+
+        def needs_logo(future):
+            if future.cancelled() or future.exception() is not None:
+                return False
+            return not (future.result()['website'] or {}).get('logo')
+
+        def check_logo(payload, future):
+            try:
+                payload['logo'] = self.scrape_clearbit_logo(payload['company'], self.extract_domain(payload['website']))
+            finally:
+                parsed.put((payload['company'], payload, future))
+
+        def finish(item, unfinished):
+            company, payload, future = item
+            unfinished[company] -= 1
+            if unfinished[company] <= 0:
+                del unfinished[company]
+            if payload is None:
+                return company, None
+            try:
+                return company, self._finish_parsed_company(payload, future.result())
+            except Exception as e:
+                logger.error(f"Parse failed for {company}: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
+                return company, None
+
+        def drain_after_dispatcher(fetch_futures):
+            """Yield the companies still owed once the dispatcher has died, failing each one."""
+            while True:
+                if not parsed.empty():
+                    yield parsed.get()
+                    continue
+                try:
+                    payload = fetched.get(timeout=0.1)
+                except queue.Empty:
+                    if all(future.done() for future in fetch_futures) and fetched.empty() and parsed.empty():
+                        return
+                    continue
+                yield payload['company'], None, None
+
+        try:
+            with ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix='logo') as logo_pool, \
+                    ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix='fetcher') as fetch_pool, \
+                    ProcessPoolExecutor(max_workers=parse_workers, mp_context=context, initializer=init_parse_worker,
+                                        initargs=(log_queue, logging.getLogger().level)) as parse_pool:
+                dispatcher = threading.Thread(target=dispatch, args=(parse_pool,), name='parse-dispatcher', daemon=True)
+                dispatcher.start()
+                fetch_futures = [fetch_pool.submit(fetch, company) for company in targets]
+                unfinished = collections.Counter(targets)
+                while unfinished:
+                    try:
+                        item = parsed.get(timeout=1)
+                    except queue.Empty:
+                        if dispatcher.is_alive():
+                            continue
+                        logger.error("Parse dispatcher stopped unexpectedly; failing the companies it did not hand out")
+                        break
+                    yield finish(item, unfinished)
+                else:
+                    dispatcher.join()
+                    return
+                for item in drain_after_dispatcher(fetch_futures):
+                    yield finish(item, unfinished)
+                for company in list(unfinished.elements()):
+                    yield company, None
+        finally:
+            log_listener.stop()
+
+    def load_scraped_at(self, companies):
+        """Return name -> scraped_at for the given companies using one projected query."""
+        if not self.mongodb_available():
+            return {}
+        start_time = time.time()
+        scraped_at = {}
+        try:
+            cursor = self.collection.find({'name': {'$in': list(companies)}}, {'_id': 0, 'name': 1, 'scraped_at': 1},
+                                          collation=NAME_COLLATION)
+            for doc in cursor:
+                if doc.get('scraped_at'):
+                    scraped_at[doc['name']] = doc['scraped_at']
+        except Exception as e:
+            logger.warning(f"Failed to load freshness data from MongoDB: {e}. Treating all companies as stale.")
+            return {}
+        logger.debug("Loaded scraped_at for %s companies in %.2fms", len(scraped_at), (time.time() - start_time)*1000)
+        return scraped_at
+
+    def select_stale_companies(self, companies, fresh_ttl):
+        """Drop companies whose stored record is younger than fresh_ttl seconds."""
+        scraped_at = self.load_scraped_at(companies)
+        cutoff = datetime.now(UTC) - timedelta(seconds=fresh_ttl)
+        stale = []
+        for company in companies:
+            last = scraped_at.get(company)
+            if last is not None and last.tzinfo is None:
+                last = last.replace(tzinfo=UTC)  # pymongo returns naive UTC datetimes by default
+            if last is None or last < cutoff:
+                stale.append(company)
+        logger.info(f"Skipping {len(companies) - len(stale)} companies scraped within the last {fresh_ttl / 3600:.1f}h")
+        return stale
+
+    def _flush_writes(self, failures_seen):
+        """Flush queued MongoDB writes before work is recorded as done.
+
+        Returns (written, lost, failures). written is False while a failed batch waits in the
+        buffer for a retry. lost is True if any write was rejected or dropped since the buffer's
+        failed count was failures_seen, including by the background flusher; failures is the
+        count to pass next time.
+        """
+        if not self.write_buffer:
+            return True, False, failures_seen
+        written = self.write_buffer.flush()
+        failures = self.write_buffer.failed
+        return written, failures != failures_seen, failures
+
+    def _commit_checkpoint(self, checkpoint):
+        """Persist finished companies only after their queued writes have been flushed; returns whether it did.
+
+        If the flush fails, the names stay pending until their writes go through. If writes were
+        dropped since the last commit, the names are left out of the checkpoint altogether, so a
+        resumed run scrapes them again rather than skipping companies that never reached MongoDB.
+        """
+        names = checkpoint.take_pending()
+        written, lost, checkpoint.write_failures = self._flush_writes(checkpoint.write_failures)
+        if lost:
+            logger.warning(f"MongoDB writes were dropped; leaving {len(names)} companies out of the checkpoint")
+            return False
+        if not written:
+            checkpoint.restore(names)
+            logger.warning(f"Not checkpointing {len(names)} companies until their MongoDB writes succeed")
+            return False
+        checkpoint.commit(names)
+        return True
+
+    def scrape_companies(self, companies, max_workers=None, fresh_ttl=None, checkpoint_path=None, checkpoint_every=25,
+                         parse_workers=0, parse_queue_size=None, on_result=None):
+        """Scrape many companies concurrently on a thread pool and report throughput.
+
+        With fresh_ttl (seconds), companies scraped more recently than that are skipped. With
+        checkpoint_path, finished companies are recorded so an interrupted run resumes where it stopped.
+        With parse_workers, the threads only fetch and HTML parsing runs in that many processes,
+        with at most parse_queue_size fetched companies waiting for them. on_result(company, record)
+        is called as each scraped company finishes, with record None if it failed.
+        """
+        max_workers = max(1, max_workers or self.max_workers)
+        start_time = time.time()
+        targets = list(companies)
+        if fresh_ttl:
+            targets = self.select_stale_companies(targets, fresh_ttl)
+        skipped_fresh = len(companies) - len(targets)
+        checkpoint = CrawlCheckpoint(checkpoint_path, companies) if checkpoint_path else None
+        if checkpoint and self.write_buffer:
+            checkpoint.write_failures = self.write_buffer.failed
+        if checkpoint:
+            targets = [c for c in targets if c not in checkpoint.completed]
+        skipped_checkpoint = len(companies) - skipped_fresh - len(targets)
+        if self.archive:
+            self.archive.write_info(targets)
+
+        if parse_workers:
+            logger.info(f"Scraping {len(targets)} companies with {max_workers} fetch worker(s) and {parse_workers} parse process(es)")
+        else:
+            logger.info(f"Scraping {len(targets)} companies with {max_workers} worker(s)")
+        self._plan_wikipedia_chunks(targets, max_workers)
+        if parse_workers:
+            scraped = self._iter_pipelined(targets, max_workers, parse_workers, parse_queue_size or parse_workers * 4)
+        else:
+            scraped = self._iter_threaded(targets, max_workers)
+        succeeded = 0
+        for company, record in scraped:
+            if on_result:
+                on_result(company, record)
+            if record:
+                succeeded += 1
+                if checkpoint:
+                    checkpoint.mark(company)
+                    if succeeded % checkpoint_every == 0:
+                        self._commit_checkpoint(checkpoint)
+        self._wiki_chunks = {}
+
+        elapsed = time.time() - start_time
+        throughput = len(targets) / (elapsed / 60) if elapsed > 0 else 0.0
+        stats = {
+            'companies': len(targets),
+            'succeeded': succeeded,
+            'failed': len(targets) - succeeded,
+            'skipped_fresh': skipped_fresh,
+            'skipped_checkpoint': skipped_checkpoint,
+            'elapsed_seconds': round(elapsed, 2),
+            'companies_per_minute': round(throughput, 2)
+        }
+        self.wiki_titles.save()
+        self.website_resolver.save()
+        self.logo_cache.save()
+        if self.write_buffer:
+            self.write_buffer.flush()
+            stats['mongo_writes'] = self.write_buffer.stats()
+        if checkpoint:
+            committed = self._commit_checkpoint(checkpoint)
+            if succeeded == len(targets) and committed:
+                checkpoint.clear()
+            elif not committed:
+                logger.info(f"Some writes did not reach MongoDB; rerun to retry those companies from checkpoint {checkpoint.path}")
+            else:
+                logger.info(f"{len(targets) - succeeded} companies failed; rerun to retry them from checkpoint {checkpoint.path}")
+        stats['hosts'] = self.limiter.stats()
+        if self.replaying:
+            stats['replay'] = {'served': self.session.hits, 'not_archived': self.session.misses}
+        elif self.memo:
+            stats['requests'] = self.memo.stats()
+        stats['stages'] = {stage: {k: v for k, v in data.items() if k != 'buckets'} for stage, data in self.metrics.snapshot().items()}
+        logger.info(f"Scraped {succeeded}/{len(targets)} companies in {elapsed:.1f}s ({throughput:.2f} companies/min)")
+        for host, data in stats['hosts'].items():
+            if data['circuit_open'] or data['consecutive_failures']:
+                logger.warning(f"Host {host}: {data['consecutive_failures']} consecutive failures, circuit {'open' if data['circuit_open'] else 'closed'}")
+        for stage, data in stats['stages'].items():
+            logger.info(f"Stage {stage}: n={data['count']} avg={data['avg_ms']:.1f}ms p95<={data['p95_ms']}ms max={data['max_ms']:.1f}ms")
+        return stats
+
+    def scrape_from_queue(self, work_queue, batch_size=None, fresh_ttl=None, parse_workers=0, parse_queue_size=None,
+                          poll_interval=30.0):
+        """Worker mode: claim companies from a shared MongoWorkQueue in batches until none are left.
+
+        Each batch goes through scrape_companies while a heartbeat keeps its leases alive. Scraped
+        companies are completed once their MongoDB writes have been flushed, and fresh ones right
+        away; failures, and companies whose writes did not go through, go back to the queue,
+        which dead-letters them after its max_attempts. While other workers still hold leases, this one polls every
+        poll_interval seconds so it can pick up items they drop. Returns per-run totals.
+        """
+        batch_size = max(1, batch_size or self.max_workers * 4)
+        totals = {'batches': 0, 'companies': 0, 'succeeded': 0, 'failed': 0}
+        with work_queue.heartbeat():
+            try:
+                while True:
+                    work_queue.dead_letter_expired()
+                    batch = work_queue.claim(batch_size)
+                    if not batch:
+                        if not work_queue.outstanding():
+                            break
+                        logger.info(f"Queue drained for now; waiting {poll_interval:g}s for leases held by other workers")
+                        time.sleep(poll_interval)
+                        continue
+                    finished = set()
+                    scraped = []
+
+                    def on_result(company, record):
+                        finished.add(company)
+                        if record:
+                            scraped.append(company)
+                        else:
+                            work_queue.fail(company, 'scrape failed')
+
+                    write_failures = self.write_buffer.failed if self.write_buffer else 0
+                    stats = self.scrape_companies(batch, fresh_ttl=fresh_ttl, parse_workers=parse_workers,
+                                                  parse_queue_size=parse_queue_size, on_result=on_result)
+                    # A scraped company is only done once its record is in MongoDB; a crash before
+                    # then leaves the lease to expire, and a failed write puts it back in the queue
+                    written, lost, _ = self._flush_writes(write_failures)
+                    persisted = written and not lost
+                    if persisted:
+                        for company in scraped:
+                            work_queue.complete(company)
+                    else:
+                        logger.warning(f"MongoDB writes for this batch did not all go through; returning {len(scraped)} companies to the queue")
+                        for company in scraped:
+                            work_queue.fail(company, 'MongoDB write failed')
+                    # Companies skipped as still fresh need no work
+                    for company in batch:
+                        if company not in finished:
+                            work_queue.complete(company)
+                    totals['batches'] += 1
+                    totals['companies'] += len(batch)
+                    totals['succeeded'] += (len(scraped) if persisted else 0) + stats['skipped_fresh']
+                    totals['failed'] += stats['failed'] + (0 if persisted else len(scraped))
+            finally:
+                work_queue.release()
+        totals['queue'] = work_queue.counts()
+        logger.info(f"Worker {work_queue.worker_id} finished {totals['companies']} companies in {totals['batches']} batches: "
+                    f"{totals['succeeded']} succeeded, {totals['failed']} failed; queue now {totals['queue']}")
+        return totals
+
+    def _iter_export_records(self, batch_size):
+        """Yield batches of records for export, from MongoDB when available, else from this run's results or spill file."""
+        if self.mongodb_available():
+            try:
+                cursor = self.collection.find({}, {'_id': 0}).batch_size(batch_size)
+                batch = []
+                for doc in cursor:
+                    batch.append(doc)
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+                if batch:
+                    yield batch
+                return
+            except Exception as e:
+                logger.warning(f"Failed to fetch records from MongoDB: {e}. Using this run's results only.")
+        if isinstance(self.results, ResultSpill):
+            yield from self.results.iter_batches(batch_size)
+            return
+        for i in range(0, len(self.results), batch_size):
+            yield self.results[i:i + batch_size]
+
+    def export_to_files(self, output_dir='output', formats=('csv', 'jsonl'), batch_size=500):
+        """Stream scraped data to CSV/JSONL/Parquet files batch by batch, deduplicated by company name."""
+        writers = []
         try:
             logger.debug("Starting data export")
             os.makedirs(output_dir, exist_ok=True)
 
-            if not self.results and self.skip_mongodb:
+            if not self.results and not self.mongodb_available():
                 logger.warning("No data to export (no results and skip_mongodb=True)")
                 return
 
-            records = self.results
-            if not self.skip_mongodb:
-                start_time = time.time()
+            for fmt in formats:
+                writer_class = EXPORT_WRITERS.get(fmt)
+                if not writer_class:
+                    logger.warning(f"Unknown export format '{fmt}', skipping")
+                    continue
+                path = os.path.join(output_dir, f"company_data.{fmt}")
                 try:
-                    records.extend(list(self.collection.find()))
-                    duration = (time.time() - start_time) * 1000
-                    logger.debug(f"Fetched {len(records)} records from MongoDB in {duration:.2f}ms")
-                except Exception as e:
-                    logger.warning(f"Failed to fetch records from MongoDB: {e}. Using in-memory results only.")
-
-            if not records:
-                logger.warning("No records to export")
+                    writers.append(writer_class(path))
+                except ImportError as e:
+                    logger.warning(f"Skipping {fmt} export, missing dependency: {e}")
+            if not writers:
+                logger.warning("No usable export formats")
                 return
 
-            df = pd.DataFrame(records)
-            if '_id' in df.columns:
-                df = df.drop('_id', axis=1)
-
-            # Convert timezone-aware datetimes to naive
-            for col in df.columns:
-                if isinstance(df[col].dtype, pd.DatetimeTZDtype):
-                    df[col] = df[col].dt.tz_localize(None)
-
-            excel_path = os.path.join(output_dir, 'company_data.xlsx')
-            try:
-                df.to_excel(excel_path, index=False)
-                logger.info(f"Successfully exported data to {excel_path}")
-            except Exception as e:
-                logger.error(f"Excel export failed: {e}. Falling back to CSV.")
-                csv_path = os.path.join(output_dir, 'company_data.csv')
-                df.to_csv(csv_path, index=False)
-                logger.info(f"Successfully exported data to {csv_path}")
-
-            if not os.path.exists(excel_path):
-                csv_path = os.path.join(output_dir, 'company_data.csv')
-                df.to_csv(csv_path, index=False)
-                logger.info(f"Successfully exported data to {csv_path}")
-
-            logger.debug("Data export completed")
+            start_time = time.time()
+            seen = set()
+            exported = 0
+            for batch in self._iter_export_records(batch_size):
+                unique = []
+                for record in batch:
+                    name = record.get('name')
+                    if not name or name in seen:
+                        continue
+                    seen.add(name)
+                    unique.append(record)
+                if unique:
+                    for writer in writers:
+                        writer.write_batch(unique)
+                    exported += len(unique)
+
+            if not exported:
+                logger.warning("No records to export")
+            duration = (time.time() - start_time) * 1000
+            logger.info(f"Exported {exported} records to {', '.join(w.path for w in writers)} in {duration:.2f}ms")
 
         except Exception as e:
-            logger.error(f"Error exporting data to files: {e}\n{traceback.format_exc()}")
+            logger.error(f"Error exporting data to files: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
+        finally:
+            for writer in writers:
+                try:
+                    writer.close()
+                except Exception as e:
+                    logger.warning(f"Failed to close export file {writer.path}: {e}")
 
 def read_companies(file_path='companies.txt'):
     """Read company names from a file, one per line."""
     try:
-        logger.debug(f"Reading companies from {file_path}")
+        logger.debug("Reading companies from %s", file_path)
         with open(file_path, 'r', encoding='utf-8') as file:
             companies = [line.strip() for line in file if line.strip() and len(line.strip()) > 1]
         logger.info(f"Read {len(companies)} companies from {file_path}")
         return companies
     except Exception as e:
-        logger.error(f"Error reading {file_path}: {e}\n{traceback.format_exc()}")
+        logger.error(f"Error reading {file_path}: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
         return []
 
 def main():
@@ -829,29 +2123,107 @@ def main():
         logger.error("MONGODB_URI environment variable not set")
         return
 
-    logger.debug(f"Using MONGODB_URI: {MONGODB_URI[:50]}... (truncated for logs)")
+    logger.debug("Using MONGODB_URI: %s... (truncated for logs)", MONGODB_URI[:50])
     DATABASE_NAME = "company_db"
     COLLECTION_NAME = "companies"
     COMPANIES_FILE = "companies.txt"
-
+    MAX_WORKERS = int(os.getenv('SCRAPER_WORKERS', '8'))
+    HOST_DELAY = float(os.getenv('SCRAPER_HOST_DELAY', '1.0'))
+    CIRCUIT_FAILURES = int(os.getenv('SCRAPER_CIRCUIT_FAILURES', '5'))
+    CIRCUIT_OPEN_SECONDS = float(os.getenv('SCRAPER_CIRCUIT_OPEN_SECONDS', '60'))
+    BROWSER_POOL_SIZE = int(os.getenv('SCRAPER_BROWSERS', '2'))
+    BROWSER_MAX_PAGES = int(os.getenv('SCRAPER_BROWSER_MAX_PAGES', '50'))
+    WRITE_BATCH_SIZE = int(os.getenv('SCRAPER_WRITE_BATCH', '50'))
+    WRITE_FLUSH_INTERVAL = float(os.getenv('SCRAPER_WRITE_INTERVAL', '5.0'))
+    FRESH_TTL_HOURS = float(os.getenv('SCRAPER_FRESH_TTL_HOURS', '168'))
+    CHECKPOINT_FILE = os.getenv('SCRAPER_CHECKPOINT', 'scrape_checkpoint.jsonl')
+    HTML_PARSER = os.getenv('SCRAPER_HTML_PARSER') or None
+    METRICS_FILE = os.getenv('SCRAPER_METRICS_FILE', 'scrape_metrics.json')
+    EXPORT_FORMATS = [fmt.strip() for fmt in os.getenv('SCRAPER_EXPORT_FORMATS', 'csv,jsonl').split(',') if fmt.strip()]
+    CACHE_DIR = os.getenv('SCRAPER_CACHE_DIR', 'http_cache')
+    CACHE_TTL = int(os.getenv('SCRAPER_CACHE_TTL', '86400'))
+    CACHE_MAX_MB = int(os.getenv('SCRAPER_CACHE_MAX_MB', '500'))
+    # 0 parses on the fetch threads; N > 0 moves parsing to N processes (e.g. os.cpu_count())
+    PARSE_WORKERS = int(os.getenv('SCRAPER_PARSE_WORKERS', '0'))
+    PARSE_QUEUE_SIZE = int(os.getenv('SCRAPER_PARSE_QUEUE', '0')) or None
+    # Empty keeps results in memory; a path spills them there so memory stays flat on long runs
+    RESULTS_SPILL = os.getenv('SCRAPER_RESULTS_SPILL', 'scrape_results.jsonl') or None
+    LOGO_CACHE_FILE = os.getenv('SCRAPER_LOGO_CACHE', 'logo_cache.json')
+    LOGO_HIT_TTL_HOURS = float(os.getenv('SCRAPER_LOGO_HIT_TTL_HOURS', '720'))
+    LOGO_MISS_TTL_HOURS = float(os.getenv('SCRAPER_LOGO_MISS_TTL_HOURS', '24'))
+    # Bodies kept by the per-run request memo; 0 fetches every request as it comes
+    MEMO_MB = int(os.getenv('SCRAPER_MEMO_MB', '64'))
+    # Record every response of this crawl to a WARC file, or re-extract from one without the network
+    RECORD_ARCHIVE = os.getenv('SCRAPER_RECORD_ARCHIVE') or None
+    REPLAY_ARCHIVE = os.getenv('SCRAPER_REPLAY_ARCHIVE') or None
+    if REPLAY_ARCHIVE:
+        # Replay is CPU-bound, so parse on every core unless told otherwise
+        PARSE_WORKERS = PARSE_WORKERS or os.cpu_count() or 1
+    # A collection name turns this process into one of many workers sharing that MongoDB work queue
+    WORK_QUEUE = os.getenv('SCRAPER_WORK_QUEUE') or None
+    QUEUE_LEASE_SECONDS = float(os.getenv('SCRAPER_QUEUE_LEASE_SECONDS', '300'))
+    QUEUE_MAX_ATTEMPTS = int(os.getenv('SCRAPER_QUEUE_MAX_ATTEMPTS', '3'))
+    QUEUE_BATCH = int(os.getenv('SCRAPER_QUEUE_BATCH', '0')) or None
+    QUEUE_REQUEUE = os.getenv('SCRAPER_QUEUE_REQUEUE', '0') == '1'
+
+    scraper_options = dict(
+        max_workers=MAX_WORKERS, host_delay=HOST_DELAY, cache_dir=CACHE_DIR,
+        cache_ttl=CACHE_TTL, cache_max_bytes=CACHE_MAX_MB * 1024 * 1024,
+        browser_pool_size=BROWSER_POOL_SIZE, browser_max_pages=BROWSER_MAX_PAGES,
+        write_batch_size=WRITE_BATCH_SIZE, write_flush_interval=WRITE_FLUSH_INTERVAL,
+        html_parser=HTML_PARSER, logo_cache_path=LOGO_CACHE_FILE,
+        logo_hit_ttl=LOGO_HIT_TTL_HOURS * 3600, logo_miss_ttl=LOGO_MISS_TTL_HOURS * 3600,
+        results_spill_path=RESULTS_SPILL, circuit_failures=CIRCUIT_FAILURES,
+        circuit_open_seconds=CIRCUIT_OPEN_SECONDS, record_archive=RECORD_ARCHIVE,
+        replay_archive=REPLAY_ARCHIVE, memo_max_bytes=MEMO_MB * 1024 * 1024
+    )
     try:
-        scraper = CompanyScraper(MONGODB_URI, DATABASE_NAME, COLLECTION_NAME, skip_mongodb=False)
+        scraper = CompanyScraper(MONGODB_URI, DATABASE_NAME, COLLECTION_NAME, skip_mongodb=False, **scraper_options)
     except Exception as e:
-        logger.error(f"Failed to initialize scraper: {e}\n{traceback.format_exc()}")
+        logger.error(f"Failed to initialize scraper: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
         logger.warning("Proceeding with skip_mongodb=True to continue scraping")
-        scraper = CompanyScraper(MONGODB_URI, DATABASE_NAME, COLLECTION_NAME, skip_mongodb=True)
+        scraper = CompanyScraper(MONGODB_URI, DATABASE_NAME, COLLECTION_NAME, skip_mongodb=True, **scraper_options)
+
+    if scraper.replaying:
+        # Rerun exactly the companies the archived crawls scraped
+        companies = list(scraper.session.reader.companies) or read_companies(COMPANIES_FILE)
+    else:
+        companies = read_companies(COMPANIES_FILE)
+
+    if WORK_QUEUE and not scraper.replaying:
+        if not scraper.mongodb_available():
+            logger.error("The work queue lives in MongoDB, which is unavailable. Exiting.")
+            scraper.close_connection()
+            return
+        work_queue = MongoWorkQueue(scraper.db[WORK_QUEUE], lease_seconds=QUEUE_LEASE_SECONDS,
+                                    max_attempts=QUEUE_MAX_ATTEMPTS)
+        work_queue.ensure_indexes()
+        # Enqueueing is idempotent, so every worker can seed the queue from its own companies file
+        if companies:
+            work_queue.enqueue(companies, requeue=QUEUE_REQUEUE)
+        scraper.scrape_from_queue(work_queue, batch_size=QUEUE_BATCH, fresh_ttl=FRESH_TTL_HOURS * 3600,
+                                  parse_workers=PARSE_WORKERS, parse_queue_size=PARSE_QUEUE_SIZE)
+        scraper.export_to_files(formats=EXPORT_FORMATS)
+        if METRICS_FILE:
+            scraper.metrics.export(METRICS_FILE)
+        scraper.close_connection()
+        return
 
-    companies = read_companies(COMPANIES_FILE)
     if not companies:
         logger.error("No companies to process. Exiting.")
         scraper.close_connection()
         return
 
-    for company in companies:
-        scraper.scrape_company(company)
-        time.sleep(10)
+    if scraper.replaying:
+        # Every archived company is re-extracted; freshness and checkpoints only apply to live crawls
+        scraper.scrape_companies(companies, parse_workers=PARSE_WORKERS, parse_queue_size=PARSE_QUEUE_SIZE)
+    else:
+        scraper.scrape_companies(companies, fresh_ttl=FRESH_TTL_HOURS * 3600, checkpoint_path=CHECKPOINT_FILE,
+                                 parse_workers=PARSE_WORKERS, parse_queue_size=PARSE_QUEUE_SIZE)
 
-    scraper.export_to_files()
+    scraper.export_to_files(formats=EXPORT_FORMATS)
+    if METRICS_FILE:
+        scraper.metrics.export(METRICS_FILE)
     scraper.close_connection()
 
 if __name__ == "__main__":
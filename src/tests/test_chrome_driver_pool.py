@@ -0,0 +1,90 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrape import ChromeDriverPool  # noqa: E402
+
+
+class FakeDriver:
+    def __init__(self):
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakeDriverPool(ChromeDriverPool):
+    def __init__(self, *args, fail_creates=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.started = []
+        self.fail_creates = fail_creates
+
+    def _create_driver(self):
+        if self.fail_creates:
+            self.fail_creates -= 1
+            raise RuntimeError('chromedriver failed to start')
+        driver = FakeDriver()
+        self.started.append(driver)
+        return driver
+
+
+def run_workers(pool, workers, pages, work=None):
+    errors = []
+
+    def run():
+        for _ in range(pages):
+            try:
+                with pool.lease() as driver:
+                    if work:
+                        work(driver)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=run, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert not any(thread.is_alive() for thread in threads), "workers are stuck waiting for a driver"
+    return errors
+
+
+def test_recycling_under_contention_does_not_deadlock():
+    pool = FakeDriverPool(size=2, max_pages=1)
+    # Holding each driver briefly keeps the other workers queued for one while drivers are recycled
+    assert run_workers(pool, workers=6, pages=5, work=lambda driver: time.sleep(0.01)) == []
+    assert len(pool.started) == 30
+    assert all(driver.quit_called for driver in pool.started)
+    assert pool._created == 0
+
+
+def test_crashed_drivers_are_replaced_for_waiting_workers():
+    pool = FakeDriverPool(size=2, max_pages=50)
+
+    def crash(driver):
+        time.sleep(0.01)
+        raise RuntimeError('tab crashed')
+
+    errors = run_workers(pool, workers=6, pages=3, work=crash)
+    assert len(errors) == 18
+    assert len(pool.started) == 18
+    assert pool._created == 0
+
+
+def test_failed_driver_start_frees_its_slot():
+    pool = FakeDriverPool(size=1, max_pages=50, fail_creates=1)
+    with pytest.raises(RuntimeError):
+        with pool.lease():
+            pass
+    assert run_workers(pool, workers=3, pages=2) == []
+    assert len(pool.started) == 1
+    pool.close()
+    assert pool.started[0].quit_called
+    with pytest.raises(RuntimeError):
+        with pool.lease():
+            pass
@@ -0,0 +1,96 @@
+import os
+import sys
+from datetime import datetime, timedelta, UTC
+
+import pytest
+
+mongomock = pytest.importorskip('mongomock')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from work_queue import MongoWorkQueue, PENDING, LEASED, DONE, DEAD  # noqa: E402
+
+
+@pytest.fixture
+def collection():
+    return mongomock.MongoClient().scraper.work_queue
+
+
+def expire_leases(collection):
+    collection.update_many({'status': LEASED}, {'$set': {'lease_until': datetime.now(UTC) - timedelta(seconds=1)}})
+
+
+def test_enqueue_is_idempotent(collection):
+    queue = MongoWorkQueue(collection, worker_id='a')
+    assert queue.enqueue(['Walmart', 'Amazon', 'Walmart']) == 2
+    assert queue.enqueue(['Walmart', 'TSMC']) == 1
+    assert queue.counts()[PENDING] == 3
+
+
+def test_claim_leases_each_item_to_one_worker(collection):
+    first = MongoWorkQueue(collection, worker_id='a')
+    second = MongoWorkQueue(collection, worker_id='b')
+    first.enqueue(['Walmart', 'Amazon', 'TSMC'])
+    claimed = first.claim(2)
+    assert len(claimed) == 2
+    assert second.claim(5) == [c for c in ['Walmart', 'Amazon', 'TSMC'] if c not in claimed]
+    assert first.claim() == []
+    assert collection.find_one({'_id': claimed[0]})['worker'] == 'a'
+
+
+def test_expired_lease_is_reclaimed_and_lost_lease_cannot_complete(collection):
+    first = MongoWorkQueue(collection, worker_id='a')
+    second = MongoWorkQueue(collection, worker_id='b')
+    first.enqueue(['Walmart'])
+    assert first.claim() == ['Walmart']
+    assert second.claim() == []
+    expire_leases(collection)
+    assert second.claim() == ['Walmart']
+    assert collection.find_one({'_id': 'Walmart'})['attempts'] == 2
+    assert first.complete('Walmart') is False
+    assert collection.find_one({'_id': 'Walmart'})['status'] == LEASED
+    assert second.complete('Walmart') is True
+    assert collection.find_one({'_id': 'Walmart'})['status'] == DONE
+
+
+def test_fail_retries_then_dead_letters(collection):
+    queue = MongoWorkQueue(collection, max_attempts=2, worker_id='a')
+    queue.enqueue(['Walmart'])
+    queue.claim()
+    assert queue.fail('Walmart', 'timeout') is True
+    assert collection.find_one({'_id': 'Walmart'})['status'] == PENDING
+    assert queue.claim() == ['Walmart']
+    queue.fail('Walmart', 'timeout again')
+    assert queue.claim() == []
+    assert [(item['_id'], item['error']) for item in queue.dead_letters()] == [('Walmart', 'timeout again')]
+    assert queue.outstanding() == 0
+
+
+def test_lease_expiring_on_final_attempt_is_dead_lettered(collection):
+    queue = MongoWorkQueue(collection, max_attempts=1, worker_id='a')
+    queue.enqueue(['Walmart'])
+    queue.claim()
+    expire_leases(collection)
+    assert queue.claim() == []
+    assert queue.dead_letter_expired() == 1
+    assert collection.find_one({'_id': 'Walmart'})['status'] == DEAD
+
+
+def test_release_returns_items_without_using_an_attempt(collection):
+    queue = MongoWorkQueue(collection, worker_id='a')
+    queue.enqueue(['Walmart', 'Amazon'])
+    queue.claim(2)
+    queue.release()
+    assert queue.held == set()
+    assert queue.counts()[PENDING] == 2
+    assert {item['attempts'] for item in collection.find()} == {0}
+
+
+def test_requeue_resets_finished_items(collection):
+    queue = MongoWorkQueue(collection, worker_id='a')
+    queue.enqueue(['Walmart'])
+    queue.claim()
+    queue.complete('Walmart')
+    queue.enqueue(['Walmart'], requeue=True)
+    item = collection.find_one({'_id': 'Walmart'})
+    assert (item['status'], item['attempts']) == (PENDING, 0)
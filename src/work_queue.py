@@ -0,0 +1,204 @@
+import logging
+import os
+import socket
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, UTC
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+DEAD = 'dead'
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class MongoWorkQueue:
+    """Company work queue shared by any number of scraper processes through one MongoDB collection.
+
+    Each company is one document keyed by its name. A worker claims items with an atomic
+    find_one_and_update that leases them for lease_seconds; while it works, heartbeat() keeps
+    extending the leases it holds. Items whose lease runs out, because their worker crashed or
+    hung, are claimed again by whoever asks next. Every claim counts as an attempt: a failed
+    item goes back to pending until it has had max_attempts, after which it is dead-lettered
+    (status 'dead', with its last error) instead of being retried forever.
+
+    Only standard CRUD operations are used, so any collection with the pymongo API works,
+    including an in-memory stand-in such as mongomock in tests.
+    """
+    def __init__(self, collection, lease_seconds=300, max_attempts=3, worker_id=None):
+        self.collection = collection
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.worker_id = worker_id or default_worker_id()
+        self.held = set()  # companies this worker currently leases
+        self._lock = threading.Lock()
+
+    def ensure_indexes(self):
+        try:
+            self.collection.create_index([('status', 1), ('lease_until', 1)], name='status_lease')
+            self.collection.create_index([('status', 1), ('attempts', 1), ('enqueued_at', 1)], name='status_attempts')
+        except Exception as e:
+            logger.warning(f"Failed to ensure work queue indexes: {e}")
+
+    def enqueue(self, companies, requeue=False):
+        """Add companies as pending items; returns how many were new.
+
+        Existing items are left alone, so every worker may enqueue the same list. With requeue,
+        finished and dead-lettered items are reset to pending for a fresh crawl.
+        """
+        now = datetime.now(UTC)
+        names = list(dict.fromkeys(companies))
+        inserted = 0
+        for i in range(0, len(names), 1000):
+            chunk = names[i:i + 1000]
+            existing = {item['_id'] for item in self.collection.find({'_id': {'$in': chunk}}, {'_id': 1})}
+            new_items = [{'_id': company, 'status': PENDING, 'attempts': 0, 'enqueued_at': now}
+                         for company in chunk if company not in existing]
+            if not new_items:
+                continue
+            try:
+                self.collection.insert_many(new_items, ordered=False)
+                inserted += len(new_items)
+            except Exception as e:
+                # Another worker seeding the same companies at the same moment only causes duplicate keys
+                errors = (getattr(e, 'details', None) or {}).get('writeErrors')
+                if not errors or any(error.get('code') != 11000 for error in errors):
+                    raise
+                inserted += len(new_items) - len(errors)
+        if requeue:
+            reset = self.collection.update_many(
+                {'_id': {'$in': names}, 'status': {'$in': [DONE, DEAD]}},
+                {'$set': {'status': PENDING, 'attempts': 0, 'enqueued_at': now},
+                 '$unset': {'error': '', 'worker': '', 'lease_until': '', 'finished_at': ''}}
+            )
+            logger.info(f"Requeued {reset.modified_count} finished or dead-lettered companies")
+        logger.info(f"Enqueued {inserted} new companies ({len(names) - inserted} already queued)")
+        return inserted
+
+    def _claimable(self, now):
+        return {
+            '$or': [{'status': PENDING}, {'status': LEASED, 'lease_until': {'$lt': now}}],
+            'attempts': {'$lt': self.max_attempts}
+        }
+
+    def claim(self, limit=1):
+        """Lease up to limit claimable items to this worker and return their company names."""
+        claimed = []
+        for _ in range(max(1, limit)):
+            now = datetime.now(UTC)
+            item = self.collection.find_one_and_update(
+                self._claimable(now),
+                {'$set': {'status': LEASED, 'worker': self.worker_id, 'claimed_at': now,
+                          'lease_until': now + timedelta(seconds=self.lease_seconds)},
+                 '$inc': {'attempts': 1}},
+                sort=[('attempts', 1), ('enqueued_at', 1)],
+                return_document=True
+            )
+            if item is None:
+                break
+            if item['attempts'] > 1:
+                logger.info(f"Reclaimed {item['_id']} (attempt {item['attempts']}/{self.max_attempts})")
+            claimed.append(item['_id'])
+        with self._lock:
+            self.held.update(claimed)
+        return claimed
+
+    def extend_leases(self):
+        """Push back the expiry of every lease this worker holds; returns how many were renewed."""
+        with self._lock:
+            held = list(self.held)
+        if not held:
+            return 0
+        result = self.collection.update_many(
+            {'_id': {'$in': held}, 'status': LEASED, 'worker': self.worker_id},
+            {'$set': {'lease_until': datetime.now(UTC) + timedelta(seconds=self.lease_seconds)}}
+        )
+        if result.matched_count < len(held):
+            # Another worker reclaimed an item after our lease lapsed; it now owns it
+            logger.warning(f"{len(held) - result.matched_count} leases of {self.worker_id} were lost before renewal")
+        return result.modified_count
+
+    @contextmanager
+    def heartbeat(self, interval=None):
+        """Renew this worker's leases in a background thread, every third of the lease by default."""
+        interval = interval or self.lease_seconds / 3
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.extend_leases()
+                except Exception as e:
+                    logger.warning(f"Work queue heartbeat failed: {e}")
+
+        thread = threading.Thread(target=run, name='queue-heartbeat', daemon=True)
+        thread.start()
+        try:
+            yield self
+        finally:
+            stop.set()
+            thread.join(timeout=interval + 1)
+
+    def _finish(self, company, update):
+        with self._lock:
+            self.held.discard(company)
+        result = self.collection.update_one({'_id': company, 'status': LEASED, 'worker': self.worker_id}, update)
+        if not result.matched_count:
+            logger.warning(f"Lease on {company} was lost before it finished; another worker now owns it")
+        return bool(result.matched_count)
+
+    def complete(self, company):
+        """Mark a leased item done."""
+        return self._finish(company, {
+            '$set': {'status': DONE, 'finished_at': datetime.now(UTC)},
+            '$unset': {'lease_until': '', 'error': ''}
+        })
+
+    def fail(self, company, error=None):
+        """Give a leased item back for another attempt, or dead-letter it once it has used max_attempts."""
+        item = self.collection.find_one({'_id': company}, {'attempts': 1})
+        dead = item is not None and item.get('attempts', 0) >= self.max_attempts
+        if dead:
+            logger.error(f"Dead-lettering {company} after {item['attempts']} attempts: {error}")
+        fields = {'status': DEAD if dead else PENDING, 'error': str(error) if error else None}
+        fields['finished_at' if dead else 'failed_at'] = datetime.now(UTC)
+        return self._finish(company, {'$set': fields, '$unset': {'lease_until': ''}})
+
+    def release(self):
+        """Hand every held item back without counting the attempt, e.g. on a clean shutdown."""
+        with self._lock:
+            held, self.held = list(self.held), set()
+        if held:
+            self.collection.update_many(
+                {'_id': {'$in': held}, 'status': LEASED, 'worker': self.worker_id},
+                {'$set': {'status': PENDING}, '$unset': {'lease_until': ''}, '$inc': {'attempts': -1}}
+            )
+            logger.info(f"Released {len(held)} unfinished companies back to the queue")
+
+    def dead_letter_expired(self):
+        """Dead-letter leased items that expired on their last allowed attempt; returns how many."""
+        result = self.collection.update_many(
+            {'status': LEASED, 'lease_until': {'$lt': datetime.now(UTC)}, 'attempts': {'$gte': self.max_attempts}},
+            {'$set': {'status': DEAD, 'error': 'lease expired on the final attempt', 'finished_at': datetime.now(UTC)},
+             '$unset': {'lease_until': ''}}
+        )
+        if result.modified_count:
+            logger.error(f"Dead-lettered {result.modified_count} companies whose workers never finished them")
+        return result.modified_count
+
+    def dead_letters(self):
+        """Return the dead-lettered items with their last error."""
+        return list(self.collection.find({'status': DEAD}, {'attempts': 1, 'error': 1, 'worker': 1}))
+
+    def outstanding(self):
+        """Count items that are pending or leased, i.e. not yet done or dead."""
+        return self.collection.count_documents({'status': {'$in': [PENDING, LEASED]}})
+
+    def counts(self):
+        return {status: self.collection.count_documents({'status': status}) for status in (PENDING, LEASED, DONE, DEAD)}